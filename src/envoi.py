@@ -4,65 +4,146 @@ Envoi automatique de la newsletter HTML générée.
 Lit la configuration SMTP et la liste des destinataires depuis le fichier .env.
 """
 
-import os, smtplib, time
+import base64, os, re, smtplib
 from datetime import date
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from email.utils import formataddr
 from src.utils.utils_env import load_env, get_env_var
+from src.utils.utils_smtp import SmtpPool
+from src.utils.utils_catalog import Catalog
+from src.utils.utils_outbox import Outbox, newsletter_hash, SENT, RETRY, FAILED
+from src.utils.utils_metrics import METRICS
 from pathlib import Path
 
-NEWSLETTER_DIR = Path("data/newsletters")
+# envoi groupé : connexions persistantes partagées entre threads, débit global limité
+POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", "3"))
+RATE_PER_MIN = float(os.getenv("SMTP_RATE_PER_MIN", "120"))   # 0 = pas de limite
+MAX_PER_CONNECTION = int(os.getenv("SMTP_MAX_PER_CONN", "100"))
+STARTTLS = os.getenv("SMTP_STARTTLS", "1") != "0"
 
 def latest_newsletter() -> Path | None:
-    files = list(NEWSLETTER_DIR.glob("newsletter_*.html"))
-    if not files:
-        return None
-    return max(files, key=lambda f: f.stat().st_mtime)
+    catalog = Catalog()
+    path = catalog.find("newsletter")
+    catalog.close()
+    return path
+
+# conversion HTML → texte : expressions compilées une seule fois
+_TEXT_RULES = [
+    (re.compile(r"(?is)<head.*?</head>"), ""),
+    (re.compile(r"(?is)<script.*?</script>"), ""),
+    (re.compile(r"(?is)<style.*?</style>"), ""),
+    (re.compile(r"(?is)<br\s*/?>"), "\n"),
+    (re.compile(r'(?is)<a\s+[^>]*href="([^"]+)"[^>]*>(.*?)</a>'), r"\2 (\1)"),
+    (re.compile(r"(?is)<[^>]+>"), ""),
+]
 
 def html_to_text(html: str) -> str:
     """Convertit le HTML en texte brut simplifié (pour clients mail texte)."""
-    import re
     text = html
-    text = re.sub(r"(?is)<head.*?</head>", "", text)
-    text = re.sub(r"(?is)<script.*?</script>", "", text)
-    text = re.sub(r"(?is)<style.*?</style>", "", text)
-    text = re.sub(r"(?is)<br\s*/?>", "\n", text)
-    text = re.sub(r'(?is)<a\s+[^>]*href="([^"]+)"[^>]*>(.*?)</a>', r"\2 (\1)", text)
-    text = re.sub(r"(?is)<[^>]+>", "", text)
+    for pattern, repl in _TEXT_RULES:
+        text = pattern.sub(repl, text)
     return text.strip()
 
 
+def unsub_url(recipient: str) -> str:
+    return f"mailto:{get_env_var('SENDER_EMAIL')}?subject=Unsubscribe&body=Please%20remove%20{recipient}"
+
+
 def personalize_unsub(html: str, recipient: str) -> str:
     """Personnalise le lien de désinscription."""
-    unsub = f"mailto:{get_env_var('SENDER_EMAIL')}?subject=Unsubscribe&body=Please%20remove%20{recipient}"
-    return html.replace('href="#"', f'href="{unsub}"')
+    return html.replace('href="#"', f'href="{unsub_url(recipient)}"')
+
+
+# emplacements propres au destinataire dans le squelette du message
+TO_SLOT = "@@RCPT_TO@@"
+UNSUB_SLOT = "@@UNSUB_URL@@"
+_BODY_SLOTS = {"plain": "@@BODY_PLAIN@@", "html": "@@BODY_HTML@@"}
+_B64_LINE = 57   # octets par ligne base64 (76 caractères)
+
+
+class _Base64Body:
+    """
+    Corps base64 avec emplacements : tout ce qui précède le premier emplacement
+    (arrondi à une ligne complète) est encodé une seule fois, seule la fin l'est à chaque envoi.
+    """
+
+    def __init__(self, body: str, slot: str):
+        raw = body.encode("utf-8")
+        first = raw.find(slot.encode())
+        cut = (len(raw) if first < 0 else first) // _B64_LINE * _B64_LINE
+        self.head = base64.encodebytes(raw[:cut]).replace(b"\n", b"\r\n")
+        self.tail = raw[cut:].split(slot.encode())
+
+    def fill(self, value: bytes) -> bytes:
+        return self.head + base64.encodebytes(value.join(self.tail)).replace(b"\n", b"\r\n")
+
+
+class MessageTemplate:
+    """
+    Message multipart (texte + HTML) rendu une seule fois ; par destinataire,
+    on ne remplit que l'en-tête To et le lien de désinscription.
+    """
+
+    def __init__(self, subject: str, html_content: str, sender_name: str, sender_email: str):
+        html = html_content.replace('href="#"', f'href="{UNSUB_SLOT}"')
+        bodies = {
+            "plain": _Base64Body(html_to_text(html), UNSUB_SLOT),
+            "html": _Base64Body(html, UNSUB_SLOT),
+        }
+
+        msg = MIMEMultipart("alternative")
+        msg["From"] = formataddr((sender_name, sender_email))
+        msg["To"] = TO_SLOT
+        msg["Subject"] = subject
+        for subtype, slot in _BODY_SLOTS.items():
+            part = MIMEText("", subtype, "utf-8")
+            part.set_payload(slot)
+            msg.attach(part)
+        skeleton = msg.as_bytes(policy=msg.policy.clone(linesep="\r\n"))
+
+        # squelette découpé en segments fixes entrecoupés d'emplacements
+        before_to, rest = skeleton.split(TO_SLOT.encode(), 1)
+        self.pieces = [before_to, None]
+        for subtype, slot in _BODY_SLOTS.items():
+            fixed, rest = rest.split(slot.encode() + b"\r\n", 1)
+            self.pieces += [fixed, bodies[subtype]]
+        self.pieces.append(rest)
+
+    def render(self, recipient: str) -> bytes:
+        url = unsub_url(recipient).encode("utf-8")
+        out = []
+        for piece in self.pieces:
+            if piece is None:
+                out.append(recipient.encode("utf-8"))
+            elif isinstance(piece, _Base64Body):
+                out.append(piece.fill(url))
+            else:
+                out.append(piece)
+        return b"".join(out)
+
+
+def build_message(to_email: str, subject: str, html_content: str, sender_name: str, sender_email: str) -> bytes:
+    """Message HTML avec alternative texte brut (pour un seul envoi ; en masse, réutiliser MessageTemplate)."""
+    return MessageTemplate(subject, html_content, sender_name, sender_email).render(to_email)
 
 
 def send_email(to_email: str, subject: str, html_content: str, sender_name: str, sender_email: str,
                smtp_host: str, smtp_port: int, smtp_user: str, smtp_pass: str):
-    """Envoie un email HTML avec fallback texte brut."""
-    text_content = html_to_text(html_content)
-
-    msg = MIMEMultipart("alternative")
-    msg["From"] = formataddr((sender_name, sender_email))
-    msg["To"] = to_email
-    msg["Subject"] = subject
-
-    msg.attach(MIMEText(text_content, "plain", "utf-8"))
-    msg.attach(MIMEText(html_content, "html", "utf-8"))
-
+    """Envoie un seul email HTML (connexion dédiée ; pour un envoi groupé, voir SmtpPool)."""
+    message = build_message(to_email, subject, html_content, sender_name, sender_email)
     try:
         with smtplib.SMTP(smtp_host, smtp_port) as server:
-            server.starttls()
+            if STARTTLS:
+                server.starttls()
             server.login(smtp_user, smtp_pass)
-            server.sendmail(sender_email, [to_email], msg.as_string())
+            server.sendmail(sender_email, [to_email], message)
             print(f"📨 Mail envoyé à {to_email}")
     except Exception as e:
         print(f"⚠️ Erreur lors de l’envoi à {to_email} : {e}")
 
 
-def main():
+def main(resume: bool = False, force: bool = False):
     load_env()
 
     # 🔹 Lecture des variables d’environnement
@@ -92,26 +173,56 @@ def main():
 
     print(f"📬 Envoi de la newsletter '{subject}' à {len(recipients)} destinataires...\n")
 
-    for recipient in recipients:
-        email = recipient.strip()
-        if not email:
-            continue
-        html_personal = personalize_unsub(html, email)
-        send_email(
-            to_email=email,
-            subject=subject,
-            html_content=html_personal,
-            sender_name=sender_name,
-            sender_email=sender_email,
-            smtp_host=smtp_host,
-            smtp_port=smtp_port,
-            smtp_user=smtp_user,
-            smtp_pass=smtp_pass,
-        )
-        time.sleep(1)  # petite pause entre les envois
-
-    print("\n✅ Envoi terminé avec succès !")
+    emails = list(dict.fromkeys(r.strip() for r in recipients if r.strip()))
+
+    # journal d'envoi : on ne renvoie jamais à un destinataire déjà servi sans le demander
+    nl_hash = newsletter_hash(html)
+    outbox = Outbox()
+    outbox.enqueue(nl_hash, emails)
+    done = outbox.stats(nl_hash).get(SENT, 0)
+    if force:
+        outbox.reset(nl_hash)
+    elif done and not resume:
+        outbox.close()
+        raise RuntimeError(f"⚠️ Cette newsletter a déjà été envoyée à {done} destinataire(s) : "
+                           "relancer avec --resume (ou --force pour tout renvoyer)")
+    todo = outbox.to_send(nl_hash, emails)
+    if resume:
+        print(f"⏩ Reprise : {len(emails) - len(todo)} destinataire(s) déjà traité(s), {len(todo)} à envoyer.")
+
+    template = MessageTemplate(subject, html, sender_name, sender_email)
+
+    pool = SmtpPool(
+        smtp_host, smtp_port, smtp_user, smtp_pass,
+        size=POOL_SIZE, starttls=STARTTLS, rate_per_min=RATE_PER_MIN,
+        max_per_connection=MAX_PER_CONNECTION,
+    )
+    try:
+        pool.send_all(sender_email, todo, template.render,
+                      on_result=lambda email, ok, code, response: outbox.record(nl_hash, email, ok, code, response))
+        stats = outbox.stats(nl_hash)
+        for email, status, code, response in outbox.failures(nl_hash):
+            print(f"⚠️ Envoi {status} pour {email} : {code or ''} {response}")
+    except (smtplib.SMTPException, OSError) as e:
+        # connexion, login ou expéditeur refusés : erreur de l'exécution, pas des destinataires
+        left = len(outbox.to_send(nl_hash, emails))
+        raise RuntimeError(f"⛔ Envoi interrompu ({e}) : {left} destinataire(s) restent à envoyer, "
+                           "relancer avec --resume une fois la configuration SMTP corrigée") from e
+    finally:
+        outbox.close()
+    print(f"\n✅ Envoi terminé : {stats.get(SENT, 0)}/{len(emails)} mails envoyés "
+          f"({pool.connects} connexion(s) SMTP, {stats.get(RETRY, 0)} à retenter avec --resume, "
+          f"{stats.get(FAILED, 0)} refusé(s)).")
 
 
 if __name__ == "__main__":
-    main()
+    import argparse
+    parser = argparse.ArgumentParser(description="Envoi de la dernière newsletter")
+    parser.add_argument("--resume", action="store_true",
+                        help="n'envoyer qu'aux destinataires pas encore servis (ou en erreur temporaire)")
+    parser.add_argument("--force", action="store_true", help="renvoyer à tous les destinataires")
+    args = parser.parse_args()
+    try:
+        main(resume=args.resume, force=args.force)
+    finally:
+        METRICS.flush("envoi")
@@ -1,13 +1,11 @@
-import argparse, os, time, random, json
+import os
 from datetime import date
 from pathlib import Path
-from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
-from src.scrap import scrape_site
-from src.utils.utils_io import save_json
-from src.utils.utils_clean import normalize_articles
-from src.traitement import main as traitement_main
-from src.newsletter_sections import main as newsletter_main
-from src.envoi import main as envoi_main
+from src.utils.utils_io import save_segment, write_jsonl, data_suffix, find_data_file, iter_jsonl
+from src.utils.utils_clean import normalize_articles, canonical_url
+from src.utils.utils_seen import SeenStore
+from src.utils.utils_catalog import Catalog
+from src.utils.utils_dedup import dedupe_near_duplicates
 
 
 # --- Liste des sites à scraper ---
@@ -22,106 +20,106 @@ SITES = [
 ]
 
 # --- Gestion du cache ---
-CACHE_FILE = Path("data/cache/seen_urls.txt")
-CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
-
-def load_seen_urls():
-    if CACHE_FILE.exists():
-        with open(CACHE_FILE, "r", encoding="utf-8") as f:
-            return set(line.strip() for line in f if line.strip())
-    return set()
-
-def update_seen_cache(urls):
-    with open(CACHE_FILE, "a", encoding="utf-8") as f:
-        for u in urls:
-            f.write(u + "\n")
-
-def canonical_url(u: str) -> str:
-    """Nettoie les URLs (enlève tracking, fragments, normalise)"""
-    if not u:
-        return ""
-    u = u.strip()
-    p = urlparse(u)
-    path = p.path[:-1] if p.path.endswith("/") and p.path != "/" else p.path
-    blacklist = {"utm_source","utm_medium","utm_campaign","utm_term","utm_content",
-                 "gclid","fbclid","ref","mc_cid","mc_eid"}
-    q = [(k, v) for k, v in parse_qsl(p.query, keep_blank_values=True) if k.lower() not in blacklist]
-    canon = urlunparse((
-        p.scheme.lower(),
-        p.netloc.lower(),
-        path,
-        "",  # params
-        urlencode(q, doseq=True),
-        ""   # fragment
-    ))
-    return canon
-
-
-# --- Début du pipeline ---
-print("🚀 Lancement du scraping multi-sources...\n")
-
-# 0️⃣ URLs déjà traitées
-already_done = load_seen_urls()
-print(f"🧠 URLs déjà traitées trouvées dans le cache : {len(already_done)}\n")
-
-# 1️⃣ Scraping des sources
-all_articles = []
-for url, src in SITES:
-    print(f"📰 Scraping {src} ...")
-    try:
-        arts = scrape_site(url, source=src, limit=5)
+# Durée de rétention des URLs vues (jours) ; au-delà, une URL peut être re-proposée
+SEEN_TTL_DAYS = int(os.getenv("SEEN_TTL_DAYS", "180"))
+SEEN_TTL_BY_SOURCE = {
+    "Cointelegraph NFT": 60,
+    "Cointelegraph AI": 60,
+}
+# au-delà de ce nombre d'URLs expirées d'un coup, la base est compactée (VACUUM)
+SEEN_COMPACT_AFTER = int(os.getenv("SEEN_COMPACT_AFTER", "1000"))
+
+def collect(limit: int = 5) -> Path:
+    """
+    Étape « scrape » : scraping de SITES, sauvegarde brute, nettoyage et regroupement des quasi-doublons.
+    Écrit les articles nettoyés du jour (ajoutés à ceux d'un scraping précédent le même jour)
+    et retourne leur chemin.
+    """
+    from src.scrap import scrape_all, close_browser, commit_validators   # bs4 / feedparser / requests : seulement pour scraper
+    print("🚀 Lancement du scraping multi-sources...\n")
+
+    # 0️⃣ URLs déjà traitées
+    already_done = SeenStore()
+    expired = already_done.evict(SEEN_TTL_BY_SOURCE, default_ttl_days=SEEN_TTL_DAYS)
+    if expired:
+        print(f"🧹 {expired} URLs expirées retirées du cache")
+    if expired >= SEEN_COMPACT_AFTER:
+        already_done.compact()
+    print(f"🧠 URLs déjà traitées trouvées dans le cache : {len(already_done)}\n")
+
+    # 1️⃣ Scraping des sources (en parallèle, politesse gérée par hôte)
+    all_articles = []
+    print(f"📰 Scraping de {len(SITES)} sources en parallèle ...")
+    for src, arts, err in scrape_all(SITES, limit=limit, seen=already_done):
+        if err:
+            print(f"⚠️ Erreur sur {src} : {err}")
+            continue
         all_articles += arts
-        print(f"✅ {len(arts)} articles récupérés depuis {src}\n")
-        time.sleep(random.uniform(1.5, 2.5))
-    except Exception as e:
-        print(f"⚠️ Erreur sur {src} : {e}\n")
-
-# 2️⃣ Filtrer les articles déjà connus
-new_articles = []
-for a in all_articles:
-    cu = canonical_url(a.get("url", ""))
-    if cu and cu not in already_done:
-        new_articles.append(a)
-
-print(f"🆕 Nouveaux articles après filtre : {len(new_articles)}")
-
-# 3️⃣ Mettre à jour le cache
-if new_articles:
-    update_seen_cache([canonical_url(a["url"]) for a in new_articles])
-    print(f"🧩 Cache mis à jour avec {len(new_articles)} nouvelles URLs.\n")
-else:
-    print("😴 Aucun nouvel article à ajouter au cache.\n")
-
-# 4️⃣ Sauvegarde brute
-save_json(new_articles)
-
-# 5️⃣ Nettoyage + sauvegarde
-cleaned = normalize_articles(new_articles)
-if len(cleaned) == 0:
-    print("⚠️ Aucun nouvel article aujourd'hui. Utilisation des derniers articles disponibles.")
-
-processed_dir = Path("data/processed") / date.today().strftime("%d-%m-%Y")
-processed_dir.mkdir(parents=True, exist_ok=True)
-processed_path = processed_dir / "articles.json"
-
-with open(processed_path, "w", encoding="utf-8") as f:
-    json.dump(cleaned, f, ensure_ascii=False, indent=2)
-
-print(f"✅ Nettoyage terminé → {processed_path}")
-print(f"🧾 Total final (nouveaux uniques) : {len(cleaned)}")
-
-# 6️⃣ Étapes IA & envoi
-print("\n🧠 Étape suivante : génération des résumés...")
-traitement_main()
-
-print("\n📰 Étape suivante : création de la newsletter...")
-newsletter_main()
-
-print("\n✅ Pipeline complet terminé ! Newsletter enregistrée dans data/newsletters/")
-
-if os.getenv("SEND_EMAIL", "true").lower() == "true":
-    print("\n📧 Début de l'envoi")
-    envoi_main()
-    print("\n✅ Mail envoyé")
-else:
-    print("\n✉️ Envoi désactivé (SEND_EMAIL=false)")
+        print(f"✅ {len(arts)} articles récupérés depuis {src}")
+    close_browser()
+    print()
+
+    # 2️⃣ Filtrer les articles déjà connus
+    new_articles = []
+    for a in all_articles:
+        cu = canonical_url(a.get("url", ""))
+        if cu and cu not in already_done:
+            new_articles.append(a)
+
+    print(f"🆕 Nouveaux articles après filtre : {len(new_articles)}")
+
+    # 3️⃣ Mettre à jour le cache
+    if new_articles:
+        added = already_done.add_many([(canonical_url(a["url"]), a.get("source", "")) for a in new_articles])
+        print(f"🧩 Cache mis à jour avec {added} nouvelles URLs.\n")
+    else:
+        print("😴 Aucun nouvel article à ajouter au cache.\n")
+
+    # 4️⃣ Sauvegarde brute (segment ajouté, l'historique n'est jamais réécrit)
+    catalog = Catalog()
+    raw_path = save_segment(new_articles)
+    if raw_path:
+        catalog.register("raw", raw_path)
+
+    # 5️⃣ Nettoyage + sauvegarde
+    cleaned = normalize_articles(new_articles)
+    n_before = len(cleaned)
+    cleaned = dedupe_near_duplicates(cleaned)
+    if len(cleaned) < n_before:
+        print(f"🪞 {n_before - len(cleaned)} quasi-doublons regroupés (sources rattachées dans 'also_in')")
+    if len(cleaned) == 0:
+        print("⚠️ Aucun nouvel article aujourd'hui. Utilisation des derniers articles disponibles.")
+
+    # 6️⃣ Un nouveau scraping du jour (--force, --from scrape) complète le fichier du jour sans l'effacer :
+    # les articles déjà sauvegardés sont maintenant dans le cache, le scraping ne les renvoie plus
+    processed_dir = Path("data/processed") / date.today().strftime("%d-%m-%Y")
+    previous = find_data_file(processed_dir, "articles")
+    kept = list(iter_jsonl(previous)) if previous is not None else []
+    if kept:
+        known = {canonical_url(a.get("url", "")) for a in kept}
+        cleaned = [a for a in cleaned if canonical_url(a.get("url", "")) not in known]
+        print(f"📎 {len(kept)} articles déjà sauvegardés aujourd'hui conservés")
+    if kept and not cleaned:
+        processed_path = previous
+    else:
+        records = kept + cleaned
+        processed_path = write_jsonl(processed_dir / f"articles{data_suffix()}", records)
+        catalog.register("processed", processed_path, records=records)
+    catalog.close()
+    already_done.close()
+    # articles persistés : les validateurs peuvent maintenant rendre le prochain passage conditionnel
+    commit_validators()
+
+    print(f"✅ Nettoyage terminé → {processed_path}")
+    print(f"🧾 Total final (nouveaux uniques) : {len(cleaned)}")
+    return processed_path
+
+
+def main(argv=None):
+    """Pipeline complet (étapes incrémentales, voir src/pipeline.py)."""
+    from src.pipeline import cli
+    cli(argv)
+
+
+if __name__ == "__main__":
+    main()
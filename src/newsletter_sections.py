@@ -2,36 +2,50 @@
 
 import json
 import os
+import re
+import string
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, datetime
 from pathlib import Path
-from typing import List, Dict, Any, Tuple
-from openai import OpenAI
+from typing import TYPE_CHECKING, List, Dict, Any, Tuple
 from src.utils.utils_env import load_env, get_env_var
+from src.utils.utils_clean import extract_first_json_block
+from src.newsletter_template import render_newsletter
+from src.utils.utils_summarize import summarize_text
+from src.utils.utils_io import iter_jsonl
+from src.utils.utils_catalog import Catalog
+from src.utils.utils_metrics import METRICS
+
+if TYPE_CHECKING:   # annotations seulement : openai reste importé au premier appel
+    from openai import OpenAI
 
 TREATED_DIR = Path("data/treated")
 DEFAULT_MODEL = "gpt-4o-mini"
+# "structured": the model returns compact JSON, HTML is rendered locally (newsletter_template)
+# "parallel": same, with one concurrent request per section (+ one for the intro)
+# "html": the model writes the whole HTML document (legacy)
+# "local": no API call at all, extractive synthesis + local template (previews, tests, fallback)
+DEFAULT_MODE = "structured"
 
 # ---------- Load today's summaries
 
 def load_today_summaries() -> Tuple[str, List[Dict[str, Any]]]:
     today_str = date.today().strftime("%d-%m-%Y")
-    fpath = TREATED_DIR / today_str / "summaries.json"
-    if not fpath.exists():
-        raise FileNotFoundError(f"Missing summaries file: {fpath}")
-    with open(fpath, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    if not isinstance(data, list) or not data:
+    catalog = Catalog()
+    fpath = catalog.find("treated", day=today_str)
+    catalog.close()
+    if fpath is None:
+        raise FileNotFoundError(f"Missing summaries file in {TREATED_DIR / today_str}")
+    data = list(iter_jsonl(fpath))
+    if not data:
         raise ValueError(f"No items in {fpath}")
     return today_str, data
 
 # ---------- Buckets (themes)
 
-def _match(text: str, *needles: str) -> bool:
-    t = (text or "").lower()
-    return any(n.lower() in t for n in needles)
-
 THEMES = [
-    ("Tokens & Crypto (NFTs)", ["nft", "crypto", "web3", "token", "blockchain", "coin", "defi"]),
+    ("Tokens & Crypto (NFTs)", ["nft", "crypto", "cryptocurrency", "web3", "token", "blockchain", "coin", "bitcoin", "ethereum", "defi"]),
     ("Auctions & Sales (upcoming & results)", ["auction", "sale", "hammer", "sold", "estimate", "christie", "sotheby", "phillips", "bonhams", "catalogue", "lot"]),
     ("Cloud / Platforms & Tools for Art", ["cloud", "saas", "platform", "api", "service", "tool", "hosting", "marketplace", "app"]),
     ("Associations & Foundations (Art × AI/Tech)", ["association", "foundation", "nonprofit", "initiative", "institute", "consortium"]),
@@ -39,43 +53,202 @@ THEMES = [
     ("Stats & Analytics (Key Signals)", ["data", "report", "statistics", "analytics", "traffic", "trend", "survey", "by the numbers", "totaled", "percent"]),
     ("Upcoming Art Events (Global)", ["fair", "biennial", "biennale", "exhibition", "opening", "festival", "event", "vip day", "preview", "week", "frieze", "art basel"]),
 ]
+OTHER = "General / Other"
+# poids d'un mot-clé selon le champ où il apparaît
+FIELD_WEIGHTS = (("title", 2.0), ("topic", 2.0), ("summary", 1.0), ("source", 1.0))
+
+# ponctuation et espaces spéciaux → espace : tout mot du texte est alors précédé d'une espace,
+# quel que soit le signe qui le précède ("crypto,nft", "x:auction", "(NFT", "art/auction")
+_PUNCT = str.maketrans({c: " " for c in string.punctuation + "\n\t\r\f\v\xa0’‘“”«»—–…·•"})
+
+def _plural(word: str) -> str:
+    """Pluriel anglais régulier : fair → fairs, sotheby → sothebies, crash → crashes (analytics : inchangé)."""
+    if word.endswith("s"):
+        return word
+    if word.endswith(("x", "z", "ch", "sh")):
+        return word + "es"
+    if len(word) > 1 and word.endswith("y") and word[-2] not in "aeiou":
+        return word[:-1] + "ies"
+    return word + "s"
+
+def _trie_pattern(words) -> str:
+    """
+    Alternative regex factorisée en arbre de préfixes ("auction|audit" → "au(?:ction|dit)") :
+    le moteur ne teste plus chaque mot-clé un par un à chaque position du texte.
+    """
+    trie: Dict[str, Any] = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node) -> str:
+        end = "" in node
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if end:
+            return "(?:" + body + ")?"
+        return body
+
+    return build(trie)
+
+def _compile_themes(themes):
+    """
+    Une seule regex compilée pour tous les mots-clés de THEMES (formes singulier + pluriel),
+    en mots entiers ("lot" ne matche pas "pilot", "app" ne matche pas "happen") ;
+    les expressions ("art basel", "by the numbers") tolèrent n'importe quel espacement.
+    La regex commence par une espace littérale (début de mot, la ponctuation du texte ayant été
+    remplacée par des espaces) : le moteur saute directement d'un mot au suivant au lieu d'essayer
+    l'arbre des mots-clés à chaque caractère (plus rapide qu'un (?<!\\w) testé à chaque position).
+    Retourne (regex, {forme normalisée: [indices de thèmes]}).
+    """
+    index: Dict[str, List[int]] = {}
+    for t, (_, keys) in enumerate(themes):
+        for k in keys:
+            k = " ".join(k.lower().translate(_PUNCT).split())
+            forms = (k,) if " " in k else (k, _plural(k))
+            for form in forms:
+                if t not in index.setdefault(form, []):
+                    index[form].append(t)
+    pattern = _trie_pattern(index).replace(r"\ ", r"\s+")
+    return re.compile(r" (?:" + pattern + r")\b"), index
+
+_THEME_RE, _THEME_INDEX = _compile_themes(THEMES)
+
+def _scan_text(item: Dict[str, Any]) -> str:
+    """
+    Champs de FIELD_WEIGHTS en un seul texte minuscule, séparés par \x00 (aucune expression ne
+    traverse deux champs) ; ponctuation remplacée par des espaces (_PUNCT) : chaque mot est précédé d'une espace.
+    """
+    return " " + " \x00 ".join(item.get(field) or "" for field, _ in FIELD_WEIGHTS).lower().translate(_PUNCT)
+
+def classify(item: Dict[str, Any]) -> Dict[str, float]:
+    """
+    Scores par thème (multi-label), par ordre décroissant.
+    Chaque mot-clé distinct trouvé dans un champ ajoute le poids de ce champ (FIELD_WEIGHTS).
+    Un seul passage de la regex sur tous les champs ; le champ d'un mot-clé est retrouvé
+    par sa position.
+    """
+    text = _scan_text(item)
+    scores = [0.0] * len(THEMES)
+    found = set()
+    for m in _THEME_RE.finditer(text):
+        field = text.count("\x00", 0, m.start())
+        key = " ".join(m.group().split())
+        if (field, key) in found:
+            continue
+        found.add((field, key))
+        for t in _THEME_INDEX[key]:
+            scores[t] += FIELD_WEIGHTS[field][1]
+    ranked = sorted((i for i, sc in enumerate(scores) if sc > 0), key=lambda i: (-scores[i], i))
+    return {THEMES[i][0]: scores[i] for i in ranked}
 
 def bucketize(items: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """Place chaque item dans son thème au meilleur score (à égalité, l'ordre de THEMES)."""
     buckets = {name: [] for name, _ in THEMES}
-    buckets["General / Other"] = []
+    buckets[OTHER] = []
     for it in items:
-        blob = " ".join([
-            it.get("title", ""), it.get("summary", ""), it.get("source", ""), it.get("topic", "")
-        ])
-        placed = False
-        for name, keys in THEMES:
-            if _match(blob, *keys):
-                buckets[name].append(it)
-                placed = True
-                break
-        if not placed:
-            buckets["General / Other"].append(it)
+        scores = classify(it)
+        buckets[next(iter(scores), OTHER)].append(it)
     return buckets
 
+# cas étiquetés : contrôle de justesse du classifieur (faux positifs "lot"/"pilot", "app"/"happen", ...)
+CLASSIFIER_CASES = [
+    ({"title": "Lot 42 sold for $3m at Christie's evening sale"}, "Auctions & Sales (upcoming & results)"),
+    ({"title": "Museum launches pilot program for young curators"}, OTHER),
+    ({"title": "Sotheby's auctions a rare Basquiat"}, "Auctions & Sales (upcoming & results)"),
+    ({"title": "What will happen to the painting after the restoration?"}, OTHER),
+    ({"title": "A new app lets collectors track provenance"}, "Cloud / Platforms & Tools for Art"),
+    ({"title": "Gallery reopens with a happening by local artists"}, OTHER),
+    ({"title": "NFTs rebound as Ethereum rallies"}, "Tokens & Crypto (NFTs)"),
+    ({"title": "Bitcoin-backed art fund", "summary": "Collectors bought tokens on a blockchain."}, "Tokens & Crypto (NFTs)"),
+    ({"title": "Art Basel opens its VIP day", "summary": "The fair welcomes 280 galleries."}, "Upcoming Art Events (Global)"),
+    ({"title": "Midjourney releases a new generative model"}, "AI/Robot Artworks & New Developments"),
+    ({"title": "Art market report: sales down 4 percent", "topic": "statistics"}, "Stats & Analytics (Key Signals)"),
+    ({"title": "Foundation funds a consortium on art and AI"}, "Associations & Foundations (Art × AI/Tech)"),
+    ({"title": "The sculptor's coincidence of shapes"}, OTHER),
+    ({"title": "Apple unveils a studio for painters"}, OTHER),
+    ({"title": "Slot machines and the aesthetics of chance"}, OTHER),
+    ({"title": "Weekly wrap", "summary": "crypto,nft"}, "Tokens & Crypto (NFTs)"),
+    ({"title": "x:auction"}, "Auctions & Sales (upcoming & results)"),
+    ({"title": "Record week;auction houses report gains"}, "Auctions & Sales (upcoming & results)"),
+]
+
+def bench_classifier(n: int = 20000) -> None:
+    """
+    Micro-benchmark : ancien scan par sous-chaîne vs regex de classify(), pour le même résultat
+    (scores multi-label par champ), sur n items synthétiques ; puis justesse des deux sur CLASSIFIER_CASES.
+    """
+    import random, time
+
+    def naive(it):
+        # ancienne méthode (re-minuscule le texte pour chaque thème, sous-chaînes brutes), mêmes scores
+        scores = {}
+        for field, weight in FIELD_WEIGHTS:
+            blob = it.get(field) or ""
+            for name, keys in THEMES:
+                t = blob.lower()
+                hits = sum(k.lower() in t for k in keys)
+                if hits:
+                    scores[name] = scores.get(name, 0.0) + hits * weight
+        return dict(sorted(scores.items(), key=lambda kv: -kv[1]))
+
+    def top(scores):
+        return next(iter(scores), OTHER)
+
+    plain = ("the a of and in to collector museum painting gallery artist record sculpture studio "
+             "pilot happen apple slot approach people new show works year city").split()
+    keys = [k for _, ks in THEMES for k in ks]
+    rnd = random.Random(0)
+
+    def text(k, rate):
+        return " ".join(rnd.choice(keys) if rnd.random() < rate else rnd.choice(plain) for _ in range(k))
+
+    # un tiers des items sans aucun mot-clé (→ General / Other), les autres plus ou moins denses
+    items = []
+    for _ in range(n):
+        rate = rnd.choice((0.0, 0.01, 0.03))
+        items.append({"title": text(10, rate), "summary": text(90, rate), "source": "Artnet", "topic": text(2, rate)})
+
+    t0 = time.perf_counter()
+    old = [top(naive(it)) for it in items]
+    t1 = time.perf_counter()
+    new = [top(classify(it)) for it in items]
+    t2 = time.perf_counter()
+    changed = sum(a != b for a, b in zip(old, new))
+    print(f"naive    : {(t1 - t0) * 1e6 / n:7.1f} µs/item (sous-chaînes, scores sur 4 champs)")
+    print(f"compiled : {(t2 - t1) * 1e6 / n:7.1f} µs/item (une regex, scores sur 4 champs) → x{(t1 - t0) / (t2 - t1):.1f}")
+    print(f"{changed}/{n} items classés différemment (mots entiers au lieu de sous-chaînes)")
+    for label, fn in (("naive", naive), ("compiled", classify)):
+        wrong = [case["title"] for case, expected in CLASSIFIER_CASES if top(fn(case)) != expected]
+        print(f"justesse {label:<8}: {len(CLASSIFIER_CASES) - len(wrong)}/{len(CLASSIFIER_CASES)}"
+              + (f"  ✗ {'; '.join(wrong)}" if wrong else ""))
+
 # ---------- Payload for LLM
 
+def trim_items(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Keep at most 10 items per section as raw material, with only the fields the model needs."""
+    trimmed = []
+    for it in items[:10]:
+        trimmed.append({
+            "title": it.get("title", ""),
+            "source": it.get("source", ""),
+            "date": it.get("date", ""),
+            "summary": it.get("summary", ""),
+            "url": it.get("url", ""),
+        })
+    return trimmed
+
 def build_llm_payload(today_str: str, buckets: Dict[str, List[Dict[str, Any]]]) -> str:
     """We pass trimmed items because we want SYNTHESIS, not a link farm."""
     payload = {"date": today_str, "sections": []}
     for section, items in buckets.items():
         if not items:
             continue
-        # keep at most 10 items per section as raw material
-        trimmed = []
-        for it in items[:10]:
-            trimmed.append({
-                "title": it.get("title", ""),
-                "source": it.get("source", ""),
-                "date": it.get("date", ""),
-                "summary": it.get("summary", ""),
-                "url": it.get("url", ""),
-            })
-        payload["sections"].append({"name": section, "items": trimmed})
+        payload["sections"].append({"name": section, "items": trim_items(items)})
     return json.dumps(payload, ensure_ascii=False)
 
 def system_prompt() -> str:
@@ -218,6 +391,214 @@ JSON INPUT:
 {json_payload}
 """.strip()
 
+# ---------- Structured mode (JSON content + local template)
+
+def structured_prompt(json_payload: str, today_str: str) -> str:
+    return f"""
+You will receive JSON with themed sections and a handful of articles per section ({today_str}).
+
+TASK:
+Write the content of a weekly magazine email that synthesizes the week. The layout is handled
+elsewhere: return ONLY the words, as compact JSON.
+
+REQUIREMENTS:
+- Language: English. Tone: clear, confident, and analytical — avoid marketing hype.
+- Focus on SYNTHESIS per section: explain what's happening now and why it matters.
+- Do NOT list all articles. Selectively weave insights into a cohesive story.
+- Plain text only inside strings: no HTML, no Markdown, no raw URLs.
+- Links: at most 3 per section, and only URLs that appear in the JSON input.
+
+Return VALID JSON ONLY with exactly this schema:
+{{
+  "tagline": "one sentence capturing the week's energy",
+  "editor_note": "5 to 8 sentences setting the tone and summarizing key trends",
+  "sections": [
+    {{
+      "name": "exact section name from the input",
+      "paragraphs": ["2 to 5 compact paragraphs"],
+      "links": [{{"text": "short anchor text", "url": "https://..."}}],
+      "bullets": ["3 to 5 concise key figures, only for the Stats & Analytics section"]
+    }}
+  ],
+  "closing": "a short, human closing remark (See you next week…)"
+}}
+
+JSON INPUT:
+{json_payload}
+""".strip()
+
+def parse_json(text: str) -> Dict[str, Any]:
+    block = extract_first_json_block(text)
+    if not block:
+        raise ValueError("Model returned no JSON content.")
+    return json.loads(block)
+
+def parse_structured(text: str, buckets: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Any]:
+    return clean_doc(parse_json(text), buckets)
+
+def clean_doc(doc: Dict[str, Any], buckets: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Any]:
+    """Keep known sections in bucket order, plain-text paragraphs and only links from the input."""
+    known_urls = {it.get("url") for items in buckets.values() for it in items if it.get("url")}
+    by_name = {s.get("name"): s for s in doc.get("sections", []) if isinstance(s, dict)}
+    sections = []
+    for name, items in buckets.items():
+        sec = by_name.get(name)
+        if not items or not sec:
+            continue
+        sections.append({
+            "name": name,
+            "paragraphs": [p for p in sec.get("paragraphs", []) if isinstance(p, str) and p.strip()],
+            "links": [l for l in sec.get("links", []) if isinstance(l, dict) and l.get("url") in known_urls][:3],
+            "bullets": [b for b in sec.get("bullets", []) if isinstance(b, str) and b.strip()],
+        })
+    if not sections:
+        raise ValueError("Model returned no usable section.")
+    doc["sections"] = sections
+    return doc
+
+def _create(client: "OpenAI", purpose: str, **body):
+    """chat.completions.create, mesuré (latence + tokens) sous l'étiquette `purpose`."""
+    t0 = time.perf_counter()
+    resp = client.chat.completions.create(**body)
+    METRICS.openai_call(purpose, body["model"], time.perf_counter() - t0, resp)
+    return resp
+
+def generate_structured(client: "OpenAI", model: str, payload: str, today_str: str, now: str,
+                        buckets: Dict[str, List[Dict[str, Any]]]) -> str:
+    resp = _create(
+        client, "newsletter-structured",
+        model=model,
+        temperature=0.5,
+        response_format={"type": "json_object"},
+        messages=[
+            {"role": "system", "content": system_prompt()},
+            {"role": "user", "content": structured_prompt(payload, today_str)},
+        ],
+    )
+    doc = parse_structured(resp.choices[0].message.content or "", buckets)
+    return render_newsletter(doc, today_str, now)
+
+def generate_html(client: "OpenAI", model: str, payload: str, today_str: str, now: str) -> str:
+    resp = _create(
+        client, "newsletter-html",
+        model=model,
+        temperature=0.5,
+        messages=[
+            {"role": "system", "content": system_prompt()},
+            {"role": "user", "content": user_prompt(payload, today_str, now)},
+        ],
+    )
+    html = (resp.choices[0].message.content or "").strip()
+    if "<html" not in html.lower():
+        raise ValueError("Model returned non-HTML content; falling back.")
+    return html
+
+# ---------- Parallel mode (one short request per section + one for the intro)
+
+def section_prompt(name: str, items: List[Dict[str, Any]]) -> str:
+    stats = "Stats & Analytics" in name
+    return f"""
+You write ONE section ("{name}") of a weekly magazine email about Art and AI/Tech.
+Below are this section's articles as JSON.
+
+- Language: English. Clear, confident, analytical; no marketing hype.
+- 2 to 5 compact paragraphs that SYNTHESIZE the developments and why they matter; do not list every article.
+- Plain text only: no HTML, no Markdown, no raw URLs.
+- At most 3 links, only URLs that appear in the input.
+{"- Add 3 to 5 concise key-figure bullets." if stats else "- No bullets."}
+
+Return VALID JSON ONLY:
+{{"paragraphs": ["..."], "links": [{{"text": "...", "url": "https://..."}}], "bullets": [{'"..."' if stats else ""}]}}
+
+ARTICLES:
+{json.dumps(trim_items(items), ensure_ascii=False)}
+""".strip()
+
+def intro_prompt(today_str: str, buckets: Dict[str, List[Dict[str, Any]]]) -> str:
+    outline = [{"section": name, "headlines": [it.get("title", "") for it in items[:10]]}
+               for name, items in buckets.items() if items]
+    return f"""
+You write the opening of a weekly magazine email about Art and AI/Tech ({today_str}).
+Below are this week's sections and headlines.
+
+Return VALID JSON ONLY (plain text, no HTML/Markdown):
+{{"tagline": "one sentence capturing the week's energy",
+  "editor_note": "5 to 8 sentences setting the tone and summarizing key trends",
+  "closing": "a short, human closing remark (See you next week…)"}}
+
+OUTLINE:
+{json.dumps(outline, ensure_ascii=False)}
+""".strip()
+
+def _chat_json(client: "OpenAI", model: str, prompt: str) -> Dict[str, Any]:
+    resp = _create(
+        client, "newsletter-section",
+        model=model,
+        temperature=0.5,
+        response_format={"type": "json_object"},
+        messages=[
+            {"role": "system", "content": system_prompt()},
+            {"role": "user", "content": prompt},
+        ],
+    )
+    return parse_json(resp.choices[0].message.content or "")
+
+def generate_parallel(client: "OpenAI", model: str, today_str: str, now: str,
+                      buckets: Dict[str, List[Dict[str, Any]]], max_workers: int = 8) -> str:
+    """
+    One concurrent request per non-empty section plus one for the tagline / editor's note,
+    assembled in bucket order: latency is that of the longest section, not the sum.
+    """
+    names = [name for name, items in buckets.items() if items]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(names) + 1)) as pool:
+        intro = pool.submit(_chat_json, client, model, intro_prompt(today_str, buckets))
+        futures = {name: pool.submit(_chat_json, client, model, section_prompt(name, buckets[name])) for name in names}
+        sections = []
+        for name in names:
+            try:
+                sections.append({**futures[name].result(), "name": name})
+            except Exception as e:
+                print(f"⚠️ Section '{name}' failed: {e}")
+        try:
+            doc = intro.result()
+        except Exception as e:
+            print(f"⚠️ Intro failed: {e} → using default tagline.")
+            doc = {}
+    doc["sections"] = sections
+    return render_newsletter(clean_doc(doc, buckets), today_str, now)
+
+# ---------- Local synthesis (no API): fallback and cheap mode
+
+def local_doc(today_str: str, buckets: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Any]:
+    """Structured newsletter content built from the summaries alone (extractive, deterministic)."""
+    sections = []
+    for name, items in buckets.items():
+        if not items:
+            continue
+        top = items[:4]
+        paragraphs = []
+        for it in top:
+            text = summarize_text(it.get("summary", ""), max_sentences=2, title=it.get("title", ""))
+            if text:
+                src = f" ({it['source']})" if it.get("source") else ""
+                paragraphs.append(f"{it.get('title', '').strip()}{src} — {text}")
+        sections.append({
+            "name": name,
+            "paragraphs": paragraphs,
+            "links": [{"text": it.get("title", ""), "url": it["url"]} for it in top[:3] if it.get("url")],
+            "bullets": [],
+        })
+    present = [s["name"] for s in sections if s["paragraphs"]]
+    n_items = sum(len(items) for items in buckets.values())
+    note = (f"This week we tracked {n_items} stories across {len(present)} themes"
+            + (f": {', '.join(present)}." if present else "."))
+    return {"editor_note": note, "sections": sections}
+
+def render_fallback(today_str: str, buckets: Dict[str, List[Dict[str, Any]]]) -> str:
+    """Complete newsletter without any API call (used when generation fails, or with --mode local)."""
+    now = datetime.now().strftime("%B %d, %Y")
+    return render_newsletter(local_doc(today_str, buckets), today_str, now)
+
 # ---------- Save
 
 def save_html(html: str) -> None:
@@ -228,37 +609,42 @@ def save_html(html: str) -> None:
     final_path = output_dir / f"newsletter_{ts}.html"
 
     final_path.write_text(html, encoding="utf-8")
+    catalog = Catalog()
+    catalog.register("newsletter", final_path)
+    catalog.close()
     print(f"✅ Newsletter generated → {final_path.resolve()}")
 
 # ---------- Main
 
-def main():
-    load_env()
+def main(mode: str = None):
+    # le mode local (aperçu hors ligne) n'a besoin ni du .env ni de la clé OpenAI
+    if (mode or os.getenv("NEWSLETTER_MODE")) != "local":
+        load_env()
+    mode = mode or os.getenv("NEWSLETTER_MODE", DEFAULT_MODE)
+
+    today_str, items = load_today_summaries()
+    buckets = bucketize(items)
+    if mode == "local":
+        save_html(render_fallback(today_str, buckets))
+        return
     api_key = get_env_var("OPENAI_API_KEY")
     model = os.getenv("OPENAI_MODEL", DEFAULT_MODEL)
     if not api_key:
         raise RuntimeError("OPENAI_API_KEY missing. Add it to your .env")
 
-    today_str, items = load_today_summaries()
-    buckets = bucketize(items)
-
     payload = build_llm_payload(today_str, buckets)
     now = datetime.now().strftime("%B %d, %Y")  # ← ajoute cette ligne
 
+    from openai import OpenAI
     client = OpenAI(api_key=api_key)
 
     try:
-        resp = client.chat.completions.create(
-            model=model,
-            temperature=0.5,
-            messages=[
-                {"role": "system", "content": system_prompt()},
-                {"role": "user", "content": user_prompt(payload, today_str, now)},  # ← et passe today_str + now
-            ],
-        )
-        html = (resp.choices[0].message.content or "").strip()
-        if "<html" not in html.lower():
-            raise ValueError("Model returned non-HTML content; falling back.")
+        if mode == "html":
+            html = generate_html(client, model, payload, today_str, now)
+        elif mode == "parallel":
+            html = generate_parallel(client, model, today_str, now, buckets)
+        else:
+            html = generate_structured(client, model, payload, today_str, now, buckets)
         save_html(html)
     except Exception as e:
         print(f"⚠️ Generation failed: {e}\n→ Using local fallback synthesis.")
@@ -266,4 +652,16 @@ def main():
         save_html(html)
 
 if __name__ == "__main__":
-    main()
+    import argparse
+    parser = argparse.ArgumentParser(description="Build the weekly newsletter from today's summaries")
+    parser.add_argument("--mode", choices=["structured", "parallel", "html", "local"],
+                        help="generation mode (default: NEWSLETTER_MODE or structured)")
+    parser.add_argument("--bench-classify", action="store_true", help="run the theme classifier micro-benchmark")
+    args = parser.parse_args()
+    if args.bench_classify:
+        bench_classifier()
+    else:
+        try:
+            main(mode=args.mode)
+        finally:
+            METRICS.flush("newsletter")
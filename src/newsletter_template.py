@@ -0,0 +1,140 @@
+# Local HTML templating for the weekly email: the model only writes the words,
+# the masthead / sections / footer markup is rendered here (deterministic, no output tokens).
+
+from html import escape
+from string import Template
+from typing import Any, Dict, List
+
+SECTION_EMOJIS = {
+    "Tokens & Crypto (NFTs)": "🔗",
+    "Auctions & Sales (upcoming & results)": "⚖️",
+    "Cloud / Platforms & Tools for Art": "☁️",
+    "Associations & Foundations (Art × AI/Tech)": "🏛️",
+    "AI/Robot Artworks & New Developments": "🤖",
+    "Stats & Analytics (Key Signals)": "📊",
+    "Upcoming Art Events (Global)": "🖼️",
+    "General / Other": "📰",
+}
+
+# ---------- Templates (compiled once at import)
+
+PAGE = Template("""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="UTF-8" />
+<meta name="viewport" content="width=device-width,initial-scale=1.0" />
+<title>Art × AI Weekly — $today</title>
+</head>
+<body style="margin:0;background-color:#fff7fa;font-family:-apple-system,BlinkMacSystemFont,'Segoe UI',Roboto,Helvetica,Arial,sans-serif;color:#333;">
+  <div style="max-width:680px;margin:40px auto;background:#ffffff;border-radius:10px;
+              box-shadow:0 4px 20px rgba(0,0,0,0.06);padding:40px;border:1px solid #ffe6f0;">
+
+    <!-- Header -->
+    <header style="margin-bottom:34px;">
+    <div style="height:6px;width:100%;
+                background:linear-gradient(90deg,#e89cae 0%,#0b66c3 100%);
+                border-radius:6px;"></div>
+
+    <div style="text-align:center;padding-top:18px;">
+        <span style="display:inline-block;font-size:12px;color:#555;background:#f0f4ff;
+                    border:1px solid #e3e9ff;border-radius:999px;padding:6px 10px;">
+        Issue date: $issue_date
+        </span>
+
+        <h1 style="margin:12px 0 6px 0;font-size:28px;color:#111;font-weight:800;letter-spacing:.2px;">
+        🎨 Art × AI Weekly Digest
+        </h1>
+
+        <p style="color:#666;font-size:15px;margin:0;">
+        $tagline</p>
+    </div>
+    </header>
+
+    <!-- Editor's note -->
+    <section style="margin:26px 0;">
+    <div style="background:#fff4f7;border:1px solid #ffe0ea;color:#333;
+                padding:14px 16px;border-radius:10px;line-height:1.6;">
+        $editor_note
+    </div>
+    </section>
+
+    <!-- Sections -->
+$sections
+    <p style="font-size:15px;line-height:1.7;color:#333;margin:26px 0 0 0;">$closing</p>
+
+    <!-- Footer -->
+    <footer style="border-top:1px solid #eee;margin-top:50px;padding-top:25px;text-align:center;color:#888;font-size:13px;line-height:1.6;">
+      <p style="margin:6px 0;">
+        — Edited and curated by <b>Emin Goktekin</b> ✍️<br>
+        <em>Founder of Bot AI ART — bridging creativity and intelligence.</em>
+      </p>
+      <p style="margin:8px 0;">
+        📬 <a href="mailto:emin.gktkn@gmail.com" style="color:#0b66c3;text-decoration:none;">emin.gktkn@gmail.com</a>
+      </p>
+      <p style="margin:12px 0;font-size:12px;">
+        <a href="#" style="color:#0b66c3;text-decoration:none;">Unsubscribe</a> •
+        <a href="#" style="color:#0b66c3;text-decoration:none;">View in browser</a>
+      </p>
+    </footer>
+
+  </div>
+</body>
+</html>
+""")
+
+SECTION = Template("""    <section style="margin:40px 0;">
+    <h2 style="background:linear-gradient(90deg,#e89cae 0%,#0b66c3 100%);
+           color:#fff;padding:10px 14px;border-radius:8px;
+           font-size:18px;font-weight:700;margin:0 0 16px 0;">
+        $emoji $name
+    </h2>
+$body
+    </section>
+    <div style="height:1px;margin:26px 0;
+            background:linear-gradient(90deg,rgba(232,154,174,.35),rgba(11,102,195,.35));"></div>
+""")
+
+PARAGRAPH = Template("""    <p style="font-size:15px;line-height:1.7;color:#333;margin:0 0 10px 0;">$text</p>""")
+BULLETS = Template("""    <ul style="font-size:15px;line-height:1.7;color:#333;margin:10px 0;padding-left:20px;">
+$items
+    </ul>""")
+BULLET = Template("""      <li>$text</li>""")
+LINK = Template("""<a href="$url" style="color:#0b66c3;text-decoration:none;">$text</a>""")
+SOURCES = Template("""    <p style="font-size:13px;line-height:1.6;color:#666;margin:10px 0 0 0;">Read more: $links</p>""")
+
+DEFAULT_TAGLINE = "A weekly curation of what’s shaping creativity and intelligence."
+DEFAULT_CLOSING = "See you next week for more at the crossroads of art and technology."
+
+# ---------- Rendering
+
+def link(text: str, url: str) -> str:
+    return LINK.substitute(url=escape(url, quote=True), text=escape(text or url))
+
+def render_section(section: Dict[str, Any]) -> str:
+    name = section.get("name", "")
+    parts: List[str] = [PARAGRAPH.substitute(text=escape(p)) for p in section.get("paragraphs", []) if p]
+    bullets = [b for b in section.get("bullets", []) if b]
+    if bullets:
+        parts.append(BULLETS.substitute(items="\n".join(BULLET.substitute(text=escape(b)) for b in bullets)))
+    links = [l for l in section.get("links", []) if l.get("url")]
+    if links:
+        parts.append(SOURCES.substitute(links=" • ".join(link(l.get("text", ""), l["url"]) for l in links)))
+    return SECTION.substitute(
+        emoji=escape(section.get("emoji") or SECTION_EMOJIS.get(name, "📰")),
+        name=escape(name),
+        body="\n".join(parts),
+    )
+
+def render_newsletter(doc: Dict[str, Any], today_str: str, issue_date: str) -> str:
+    """
+    Render the full email from structured content:
+    {"tagline", "editor_note", "sections": [{"name", "paragraphs", "links", "bullets"}], "closing"}
+    """
+    return PAGE.substitute(
+        today=escape(today_str),
+        issue_date=escape(issue_date),
+        tagline=escape(doc.get("tagline") or DEFAULT_TAGLINE),
+        editor_note=escape(doc.get("editor_note") or ""),
+        sections="".join(render_section(s) for s in doc.get("sections", []) if s.get("paragraphs")),
+        closing=escape(doc.get("closing") or DEFAULT_CLOSING),
+    )
@@ -0,0 +1,202 @@
+# src/pipeline.py
+"""
+Pipeline incrémental : scrape → summarize → newsletter → send.
+Chaque étape déclare ses entrées (empreintes des fichiers produits par l'étape précédente, paramètres)
+et sa sortie ; une étape dont les entrées n'ont pas changé et dont la sortie existe est sautée.
+Après un échec, relancer ne refait que les étapes nécessaires.
+"""
+
+import hashlib, json, os, time
+from datetime import date
+from src.utils.utils_http import JsonCache
+from src.utils.utils_catalog import Catalog
+from src.utils.utils_metrics import METRICS
+
+
+class StageState(JsonCache):
+    """Dernière exécution réussie de chaque étape : {étape: {"fingerprint", "at", "seconds"}}."""
+
+    def __init__(self, path="data/cache/pipeline_state.json"):
+        super().__init__(path)
+
+    def fingerprint(self, stage: str):
+        with self._lock:
+            return (self._load().get(stage) or {}).get("fingerprint")
+
+    def record(self, stage: str, fingerprint: str, seconds: float):
+        with self._lock:
+            self._load()[stage] = {"fingerprint": fingerprint, "at": time.time(), "seconds": round(seconds, 1)}
+            self._save()
+
+
+def fingerprint(inputs: dict) -> str:
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class Stage:
+    """
+    Une étape du pipeline :
+    - inputs(ctx) : dict des entrées (empreintes, paramètres) → fingerprint
+    - output(ctx) : la sortie existe-t-elle déjà, complète ? (None = seul le fingerprint compte) ;
+                    vérifiée aussi après run : une sortie incomplète n'enregistre pas l'étape
+    - run(ctx)    : exécute l'étape
+    """
+
+    def __init__(self, name, run, inputs, output=None, describe=""):
+        self.name, self.run, self.inputs, self.output, self.describe = name, run, inputs, output, describe
+
+
+def _latest_digest(kind, day=None, nonempty=False):
+    catalog = Catalog()
+    path = catalog.find(kind, day=day, nonempty=nonempty)
+    digest = catalog.digest(path) if path else None
+    catalog.close()
+    return path, digest
+
+
+# ---------- Étapes
+
+def _scrape(ctx):
+    from src.main import collect
+    collect()
+
+
+def _scrape_inputs(ctx):
+    from src.main import SITES
+    # le scraping dépend du jour : une fois par jour suffit (sauf --from / --only / --force)
+    return {"day": ctx["day"], "sites": SITES}
+
+
+def _summarize(ctx):
+    from src.traitement import main as traitement_main
+    # reprise par le journal : un résumé déjà obtenu aujourd'hui n'est jamais redemandé
+    traitement_main(resume=True, local=ctx["local"])
+
+
+def _summarize_output(ctx):
+    from src.traitement import summary_errors
+    # des articles en erreur : l'étape reste à refaire (la reprise ne redemande que ceux-là)
+    return _latest_digest("treated", day=ctx["day"])[0] is not None and not summary_errors(ctx["day"])
+
+
+def _summarize_inputs(ctx):
+    from src.traitement import PROMPT_ID, MODEL
+    path, digest = _latest_digest("processed", day=ctx["day"])
+    if path is None:
+        path, digest = _latest_digest("processed", nonempty=True)
+    return {"articles": digest, "prompt": PROMPT_ID, "model": MODEL, "local": ctx["local"]}
+
+
+def _newsletter(ctx):
+    from src.newsletter_sections import main as newsletter_main
+    newsletter_main(mode=ctx["mode"])
+
+
+def _newsletter_inputs(ctx):
+    _, digest = _latest_digest("treated", day=ctx["day"])
+    return {"summaries": digest, "mode": ctx["mode"] or os.getenv("NEWSLETTER_MODE", "structured"),
+            "model": os.getenv("OPENAI_MODEL", "")}
+
+
+def _send(ctx):
+    if os.getenv("SEND_EMAIL", "true").lower() != "true":
+        print("✉️ Envoi désactivé (SEND_EMAIL=false)")
+        return
+    from src.envoi import main as envoi_main
+    # le journal d'envoi évite tout doublon si l'étape est relancée
+    envoi_main(resume=True)
+
+
+def _send_inputs(ctx):
+    _, digest = _latest_digest("newsletter")
+    return {"newsletter": digest, "enabled": os.getenv("SEND_EMAIL", "true").lower() == "true"}
+
+
+STAGES = [
+    Stage("scrape", _scrape, _scrape_inputs,
+          output=lambda ctx: _latest_digest("processed", day=ctx["day"])[0] is not None,
+          describe="scraping, sauvegarde brute, nettoyage → data/processed/"),
+    Stage("summarize", _summarize, _summarize_inputs, output=_summarize_output,
+          describe="résumés des articles → data/treated/"),
+    Stage("newsletter", _newsletter, _newsletter_inputs,
+          output=lambda ctx: _latest_digest("newsletter", day=ctx["day"])[0] is not None,
+          describe="newsletter HTML → data/newsletters/"),
+    Stage("send", _send, _send_inputs, describe="envoi aux destinataires"),
+]
+STAGE_NAMES = [s.name for s in STAGES]
+
+
+def run(start=None, only=None, force=False, local=False, mode=None, dry_run=False):
+    """
+    Exécute les étapes dans l'ordre, en sautant celles qui sont à jour.
+    - start : commence à cette étape (elle est toujours exécutée, les suivantes si besoin)
+    - only  : n'exécute que cette étape (toujours)
+    - force : exécute toutes les étapes sélectionnées
+    Les mesures de l'exécution (durée par étape, requêtes, appels, envois) sont écrites à la fin,
+    même après un échec : data/metrics/runs/run_<id>.json et data/metrics/aiart_pipeline.prom.
+    """
+    ctx = {"day": date.today().strftime("%d-%m-%Y"), "local": local, "mode": mode}
+    if only:
+        selected = [only]
+    elif start:
+        selected = STAGE_NAMES[STAGE_NAMES.index(start):]
+    else:
+        selected = STAGE_NAMES
+    forced = {only or start} if (only or start) else set()
+    state = StageState()
+    t_total = time.perf_counter()
+    try:
+        _run_stages(ctx, selected, forced, force, dry_run, state)
+    finally:
+        if not dry_run:
+            METRICS.observe("pipeline_seconds", time.perf_counter() - t_total)
+            METRICS.flush("pipeline")
+
+    if not dry_run:
+        print(f"\n🏁 Pipeline terminé en {time.perf_counter() - t_total:.1f}s")
+
+
+def _run_stages(ctx, selected, forced, force, dry_run, state):
+    for stage in STAGES:
+        if stage.name not in selected:
+            continue
+        fp = fingerprint(stage.inputs(ctx))
+        up_to_date = state.fingerprint(stage.name) == fp and (stage.output is None or stage.output(ctx))
+        if up_to_date and not force and stage.name not in forced:
+            print(f"⏭️  {stage.name} : à jour, étape sautée")
+            continue
+        if dry_run:
+            print(f"▶️  {stage.name} : à exécuter ({stage.describe})")
+            continue
+
+        print(f"\n▶️  Étape {stage.name} : {stage.describe}")
+        t0 = time.perf_counter()
+        try:
+            stage.run(ctx)
+        finally:
+            elapsed = time.perf_counter() - t0
+            METRICS.observe("stage_seconds", elapsed, stage=stage.name)
+        if stage.output is not None and not stage.output(ctx):
+            print(f"⚠️ {stage.name} terminé en {elapsed:.1f}s, sortie incomplète : l'étape sera refaite au prochain lancement")
+            continue
+        # fingerprint recalculé : l'étape a pu produire ses propres entrées (ex. premier scraping du jour)
+        state.record(stage.name, fingerprint(stage.inputs(ctx)), elapsed)
+        print(f"✅ {stage.name} terminé en {elapsed:.1f}s")
+
+
+def cli(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Pipeline Bot AI ART (étapes incrémentales)")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--from", dest="start", choices=STAGE_NAMES, help="reprendre à partir de cette étape")
+    group.add_argument("--only", choices=STAGE_NAMES, help="n'exécuter que cette étape")
+    parser.add_argument("--force", action="store_true", help="ignorer les empreintes, tout ré-exécuter")
+    parser.add_argument("--local", action="store_true", help="résumés extractifs locaux, sans API")
+    parser.add_argument("--mode", choices=["structured", "parallel", "html", "local"], help="mode de la newsletter")
+    parser.add_argument("--dry-run", action="store_true", help="afficher les étapes à exécuter, sans rien lancer")
+    args = parser.parse_args(argv)
+    run(start=args.start, only=args.only, force=args.force, local=args.local, mode=args.mode, dry_run=args.dry_run)
+
+
+if __name__ == "__main__":
+    cli()
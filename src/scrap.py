@@ -1,26 +1,57 @@
-import os, time, logging, random
+import os, logging, time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from urllib.parse import urljoin
-import requests
 from bs4 import BeautifulSoup
 import feedparser
-from playwright.sync_api import sync_playwright
+from src.utils.utils_http import (HostScheduler, NotModified, ValidatorCache, TierMemory, SelectorMemory,
+                                  make_session, host_of)
+from src.utils.utils_browser import BrowserPool, PLAYWRIGHT_AVAILABLE
+from src.utils.utils_clean import canonical_url
+from src.utils.utils_metrics import METRICS
 
 # scrappes un site pour y récupérer les données dont on a besoin
 
-def sleep_jitter(min_s=0.8, max_s=1.8):
-    """Pause aléatoire pour éviter les rafales suspectes."""
-    time.sleep(random.uniform(min_s, max_s))
-    
-try:
-    from playwright.sync_api import sync_playwright
-    PLAYWRIGHT_AVAILABLE = True
-except Exception:
-    PLAYWRIGHT_AVAILABLE = False
-
 # Config
 HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0 Safari/537.36"}
 TIMEOUT = 15
-RATE_SLEEP = 1.2  # pause entre requêtes
+# Politesse par hôte : remplace les pauses globales entre sources/articles
+HOST_LIMITS = {
+    "news.artnet.com": {"max_per_host": 2, "min_delay": 1.2},
+    "www.artnews.com": {"max_per_host": 2, "min_delay": 1.2},
+    "techcrunch.com": {"max_per_host": 1, "min_delay": 1.5},
+    "fr.cointelegraph.com": {"max_per_host": 1, "min_delay": 2.0},
+}
+SCHEDULER = HostScheduler(max_per_host=2, min_delay=1.0, jitter=0.8, overrides=HOST_LIMITS)
+MAX_WORKERS = int(os.getenv("SCRAPE_WORKERS", "8"))
+ARTICLE_WORKERS = int(os.getenv("SCRAPE_ARTICLE_WORKERS", "4"))
+# ETag / Last-Modified des flux et pages de liste (GET conditionnels)
+VALIDATORS = ValidatorCache()
+# Extraction d'article : HTML statique d'abord, Playwright si le texte est trop court
+MIN_STATIC_CHARS = int(os.getenv("MIN_STATIC_CHARS", "800"))
+TIERS = TierMemory()
+# Navigateur partagé par toute l'exécution (démarré au premier rendu)
+BROWSER = BrowserPool(
+    contexts=int(os.getenv("BROWSER_CONTEXTS", "2")),
+    pages_per_context=int(os.getenv("BROWSER_PAGES_PER_CONTEXT", "2")),
+    user_agent=HEADERS["User-Agent"],
+    block_resources=os.getenv("BROWSER_BLOCK_RESOURCES", "true").lower() == "true",
+    selectors=SelectorMemory(),
+)
+# Rendu Playwright : attente d'un sélecteur plutôt qu'un délai fixe, réglable par hôte.
+# Timeouts courts : un sélecteur jamais trouvé sur un domaine est retenu (SelectorMemory)
+# et remplacé par un délai fixe de 2 s aux rendus suivants.
+RENDER_DEFAULTS = {
+    "article": {"wait_for": "article p", "timeout": 20000, "selector_timeout": 4000},
+    "listing": {"wait_for": "li article a[href]", "timeout": 60000, "selector_timeout": 6000},
+}
+RENDER_PROFILES = {
+    "techcrunch.com": {"article": {"wait_for": "div.entry-content p, article p"}},
+    "fr.cointelegraph.com": {
+        "article": {"wait_for": "div.post-content p, article p", "selector_timeout": 6000},
+        "listing": {"selector_timeout": 8000},
+    },
+}
 USE_PROXY = os.getenv("USE_PROXY", "false").lower() == "true"
 PROXIES = None
 if USE_PROXY:
@@ -30,15 +61,59 @@ if USE_PROXY:
     port = os.getenv("BRD_PORT", "22225")
     proxy_url = f"http://{user}:{pwd}@{host}:{port}"
     PROXIES = {"http": proxy_url, "https": proxy_url}
+SESSION = make_session(headers=HEADERS, proxies=PROXIES)
 
 logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 
+def render_options(url, kind):
+    """Options de rendu (wait_for, timeout, ...) pour une page 'article' ou 'listing' de cet hôte."""
+    opts = dict(RENDER_DEFAULTS[kind])
+    opts.update(RENDER_PROFILES.get(host_of(url), {}).get(kind, {}))
+    return opts
+
+@contextmanager
+def _fetch_metrics(url, tier):
+    """
+    Mesure une requête (hors attente de politesse : à ouvrir dans le créneau SCHEDULER).
+    Le bloc dépose m["response"] (requests) ou m["html"] (navigateur) pour la taille et le statut.
+    """
+    m, t0, ok = {}, time.perf_counter(), False
+    try:
+        yield m
+        ok = True
+    finally:
+        r, html = m.get("response"), m.get("html")
+        if r is not None:
+            nbytes, status, ok = len(r.content), r.status_code, ok and r.status_code < 400
+        else:
+            # navigateur : taille du HTML rendu (les ressources bloquées ou annexes ne sont pas comptées)
+            nbytes, status = (len(html.encode("utf-8")) if html else None), None
+        METRICS.fetch(url, tier, time.perf_counter() - t0, nbytes=nbytes, status=status, ok=ok)
+
+def parse_feed(feed_url):
+    """
+    Flux RSS téléchargé par la session partagée (GET conditionnel : etag / modified mémorisés),
+    puis analysé par feedparser : octets, statut et latence viennent de la même réponse.
+    Lève NotModified si le serveur répond 304, HTTPError sur une erreur HTTP.
+    """
+    with SCHEDULER.slot(feed_url), _fetch_metrics(feed_url, "rss") as m:
+        r = m["response"] = SESSION.get(feed_url, headers=VALIDATORS.request_headers(feed_url), timeout=TIMEOUT)
+    if r.status_code == 304:
+        logging.info("Feed not modified: %s", feed_url)
+        raise NotModified(feed_url)
+    r.raise_for_status()
+    # en-têtes transmis pour l'encodage déclaré (Content-Type)
+    feed = feedparser.parse(r.content, response_headers={k.lower(): v for k, v in r.headers.items()})
+    if not feed.bozo:
+        VALIDATORS.stage(feed_url, etag=r.headers.get("ETag"), modified=r.headers.get("Last-Modified"))
+    return feed
+
 def try_rss(url):
-    """Retourne list d'items (title, link, published) si RSS ok, sinon []"""
+    """Retourne list d'items (title, link, published) si RSS ok, sinon []. Lève NotModified sur 304."""
     feed_url = url.rstrip("/") + "/feed"
     logging.info("Try RSS: %s", feed_url)
     try:
-        feed = feedparser.parse(feed_url)
+        feed = parse_feed(feed_url)
         if feed.bozo:
             return []
         items = []
@@ -49,23 +124,31 @@ def try_rss(url):
                 "date": e.get("published") or e.get("updated")
             })
         return items
+    except NotModified:
+        raise
     except Exception as e:
         logging.warning("RSS failed: %s", e)
         return []
 
 def try_requests(url):
-    """Requête simple + parse HTML. Retourne raw html ou None si bloqué."""
+    """Requête simple (conditionnelle) + parse HTML. Retourne raw html ou None si bloqué. Lève NotModified sur 304."""
     logging.info("Try requests GET: %s", url)
     try:
-        sleep_jitter() #anti rafale
-        r = requests.get(url, headers=HEADERS, timeout=TIMEOUT, proxies=PROXIES)
+        with SCHEDULER.slot(url), _fetch_metrics(url, "listing") as m:
+            r = m["response"] = SESSION.get(url, headers=VALIDATORS.request_headers(url), timeout=TIMEOUT)
+        if r.status_code == 304:
+            logging.info("Page not modified: %s", url)
+            raise NotModified(url)
         r.raise_for_status()
         text = r.text
         # très simple check Cloudflare block
         if "Attention Required" in text or "Please enable cookies" in text or "Sorry, you have been blocked" in text:
             logging.warning("Blocked by Cloudflare or similar.")
             return None
+        VALIDATORS.stage(url, etag=r.headers.get("ETag"), modified=r.headers.get("Last-Modified"))
         return text
+    except NotModified:
+        raise
     except Exception as e:
         logging.warning("Requests failed: %s", e)
         return None
@@ -77,15 +160,9 @@ def try_playwright(url):
         return None
     logging.info("Try Playwright: %s", url)
     try:
-        with sync_playwright() as p:
-            sleep_jitter()
-            browser = p.chromium.launch(headless=True)
-            ctx = browser.new_context(user_agent=HEADERS["User-Agent"])
-            page = ctx.new_page()
-            page.goto(url, timeout=60000)
-            html = page.content()
-            browser.close()
-            return html
+        with SCHEDULER.slot(url), _fetch_metrics(url, "listing-browser") as m:
+            html = m["html"] = BROWSER.render(url, **render_options(url, "listing"))
+        return html
     except Exception as e:
         logging.warning("Playwright failed: %s", e)
         return None
@@ -103,13 +180,30 @@ def extract_list_from_html(html, base=None):
         out.append({"title": title, "url": link})
     return out
 
-def fetch_source(url):
-    """Flow: rss -> requests -> playwright. Retourne liste d'items (title,url,maybe date)."""
+def filter_unseen(items, seen=None):
+    """
+    Retire de la liste les articles déjà connus, avant tout rendu.
+    - seen = conteneur d'URLs canoniques (set, store...) ou prédicat url -> bool
+    """
+    if seen is None:
+        return items
+    is_seen = seen if callable(seen) else seen.__contains__
+    out = [it for it in items if not is_seen(canonical_url(it.get("url") or ""))]
+    if len(out) != len(items):
+        logging.info("Skipped %d already-seen items", len(items) - len(out))
+    return out
+
+
+def fetch_source(url, seen=None):
+    """
+    Flow: rss -> requests -> playwright. Retourne liste d'items (title,url,maybe date) non vus.
+    Lève NotModified si le flux ou la page de liste n'a pas changé (304).
+    """
     # 1) RSS
     rss_items = try_rss(url)
     if rss_items:
         logging.info("RSS success, %d items", len(rss_items))
-        return rss_items
+        return filter_unseen(rss_items, seen)
 
     # 2) requests
     html = try_requests(url)
@@ -117,20 +211,21 @@ def fetch_source(url):
         items = extract_list_from_html(html, base=url)
         if items:
             logging.info("Requests parse ok, %d items", len(items))
-            return items
+            return filter_unseen(items, seen)
 
     # 3) playwright
     html = try_playwright(url)
     if html:
         items = extract_list_from_html(html, base=url)
         logging.info("Playwright parse ok, %d items", len(items))
-        return items
+        return filter_unseen(items, seen)
 
     logging.error("All methods failed for %s", url)
     return []
 
 def get_articles_from_rss(rss_url):
-    feed = feedparser.parse(rss_url)
+    """Articles d'un flux RSS. Lève NotModified si le flux n'a pas changé (304)."""
+    feed = parse_feed(rss_url)
     articles = []
     for entry in feed.entries:
         articles.append({
@@ -141,67 +236,140 @@ def get_articles_from_rss(rss_url):
     return articles
 
 
-def get_article_text(url, page):
-    """Extrait le texte complet d’un article (navigateur déjà ouvert)"""
+def extract_article_text(html):
+    """Texte des paragraphes d'un article (article p, sinon tous les p)."""
+    soup = BeautifulSoup(html, "html.parser")
+    paragraphs = soup.select("article p")
+    if not paragraphs:
+        paragraphs = soup.find_all("p")
+    return " ".join(p.get_text(strip=True) for p in paragraphs)
+
+
+def get_static_text(url):
+    """Niveau 1 : GET simple via la session partagée, sans navigateur. Retourne le texte ou None."""
     try:
-        sleep_jitter() #pause avant d'ouvrir la page
-        page.goto(url, timeout=20000)
-        page.wait_for_timeout(2000)
-        html = page.content()
-
-        soup = BeautifulSoup(html, "html.parser")
-        paragraphs = soup.select("article p")
-        if not paragraphs:
-            paragraphs = soup.find_all("p")
-
-        text = " ".join(p.get_text(strip=True) for p in paragraphs)
-        return text if text else None
+        with SCHEDULER.slot(url), _fetch_metrics(url, "static") as m:
+            r = m["response"] = SESSION.get(url, timeout=TIMEOUT)
+        r.raise_for_status()
+        return extract_article_text(r.text) or None
     except Exception as e:
-        print(f"[Erreur Playwright] {url} -> {e}")
+        logging.info("Static fetch failed: %s -> %s", url, e)
         return None
 
 
-def scrape_site(url: str, source: str, limit=None):
+def get_article_text(url, browser=None):
+    """
+    Extrait le texte complet d’un article, par niveaux :
+    1) HTML statique (requests) ; 2) Playwright si le texte obtenu est trop court.
+    Le niveau qui a fonctionné est retenu par domaine pour les prochains articles.
+    """
+    host = host_of(url)
+    static = None
+    if TIERS.get(host) != "browser":
+        static = get_static_text(url)
+        if static and len(static) >= MIN_STATIC_CHARS:
+            TIERS.record(host, "static")
+            return static
+
+    browser = browser or BROWSER
+    try:
+        with SCHEDULER.slot(url), _fetch_metrics(url, "browser") as m:
+            html = m["html"] = browser.render(url, **render_options(url, "article"))
+        text = extract_article_text(html)
+        if text and len(text) > len(static or ""):
+            TIERS.record(host, "browser")
+            return text
+        return static or text or None
+    except Exception as e:
+        print(f"[Erreur Playwright] {url} -> {e}")
+        return static
+
+
+def _forget_validators(url):
+    VALIDATORS.forget(url, url.rstrip("/") + "/feed")
+
+
+def scrape_site(url: str, source: str, limit=None, seen=None):
     """
     Scrape un site ou flux RSS et retourne une liste d’articles complets.
     - url peut être une page d'accueil ou un flux RSS
     - source = nom du site (ex: 'Artnet', 'ArtNews')
+    - seen = URLs canoniques déjà traitées (ou prédicat) : filtrées avant tout rendu,
+      `limit` ne compte donc que les nouveaux articles
     """
-    from playwright.sync_api import sync_playwright
-
     # essaie de récupérer les articles via RSS ou fallback
-    if url.endswith("/feed") or url.endswith(".xml"):
-        articles = get_articles_from_rss(url)
-    else:
-        articles = fetch_source(url)
+    try:
+        if url.endswith("/feed") or url.endswith(".xml"):
+            articles = filter_unseen(get_articles_from_rss(url), seen)
+        else:
+            articles = fetch_source(url, seen=seen)
+    except NotModified:
+        print(f"♻️ {source} : pas de changement depuis le dernier passage")
+        return []
 
     if not articles:
-        print(f"❌ Aucun article trouvé sur {source}")
+        print(f"❌ Aucun nouvel article trouvé sur {source}")
         return []
 
     articles_data = []
+    pending = list(articles)
+    failed = 0
+
+    # rendu de plusieurs articles à la fois, par vagues jusqu'à atteindre `limit`
+    with ThreadPoolExecutor(max_workers=ARTICLE_WORKERS) as pool:
+        while pending and not (limit and len(articles_data) >= limit):
+            n = (limit - len(articles_data)) if limit else len(pending)
+            batch, pending = pending[:n], pending[n:]
+            texts = pool.map(lambda a: get_article_text(a["url"]), batch)
+            for art, text in zip(batch, texts):
+                if not text:
+                    failed += 1
+                    continue
+                articles_data.append({
+                    "title": art.get("title", ""),
+                    "url": art.get("url", ""),
+                    "date": art.get("date", ""),
+                    "source": source,
+                    "content": text
+                })
+
+    # des articles nouveaux restent non traités (limit) ou n'ont pas pu être lus : on oublie
+    # les validateurs pour que le prochain passage relise la liste au lieu de recevoir un 304
+    if pending or failed:
+        _forget_validators(url)
+
+    return articles_data
+
+
+def scrape_all(sites, limit=None, seen=None, max_workers=MAX_WORKERS):
+    """
+    Scrape plusieurs sources en parallèle.
+    - sites = liste de (url, source)
+    - seen = URLs déjà traitées, transmis à scrape_site
+    - la politesse est gérée par hôte (SCHEDULER) : des hôtes différents avancent
+      en parallèle, les sources d'un même hôte se partagent ses créneaux.
+    Retourne une liste de (source, articles, erreur) dans l'ordre de `sites`.
+    """
+    def _one(site):
+        url, source = site
+        try:
+            with METRICS.timer("source_seconds", source=source):
+                return source, scrape_site(url, source=source, limit=limit, seen=seen), None
+        except Exception as e:
+            _forget_validators(url)
+            return source, [], e
+
+    if not sites:
+        return []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(sites))) as pool:
+        return list(pool.map(_one, sites))
+
+
+def commit_validators():
+    """Enregistre les ETag / Last-Modified reçus, une fois les articles du passage sauvegardés."""
+    VALIDATORS.commit()
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        ctx = browser.new_context(user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64)")
-        page = ctx.new_page()
-
-        count = 0
-        for art in articles:
-            if limit and count >= limit:
-                break
-            text = get_article_text(art["url"], page)
-            if not text:
-                continue
-            articles_data.append({
-                "title": art.get("title", ""),
-                "url": art.get("url", ""),
-                "date": art.get("date", ""),
-                "source": source,
-                "content": text
-            })
-            count += 1
-            sleep_jitter(0.6,1.2) #mini pause entre deux articles
-        browser.close()
 
-    return articles_data
\ No newline at end of file
+def close_browser():
+    """Ferme le navigateur partagé (à appeler une fois le scraping terminé)."""
+    BROWSER.close()
\ No newline at end of file
@@ -1,100 +1,138 @@
 # traitement.py
-# V3 : traite TOUS les articles → envoie à OpenAI → crée summaries.json
+# V3 : traite TOUS les articles → envoie à OpenAI → crée summaries.jsonl.gz
 
 import json
-import re
 import os
 from datetime import date
 from pathlib import Path
-from typing import Optional, Dict, Any
-from time import sleep
-from openai import OpenAI
+from typing import TYPE_CHECKING, Optional, Dict, Any
+from time import sleep, perf_counter
+from threading import Lock
+from concurrent.futures import ThreadPoolExecutor
 from src.utils.utils_env import load_env, get_env_var
+from src.utils.utils_clean import extract_first_json_block
+from src.utils.utils_rate import RateLimiter, backoff_delay, retry_after_seconds
+from src.utils.utils_cache import SummaryCache, summary_key
+from src.utils.utils_tokens import count_tokens, trim_to_budget
+from src.utils.utils_summarize import local_summary
+from src.utils.utils_io import write_jsonl, iter_jsonl, data_suffix
+from src.utils.utils_catalog import Catalog
+from src.utils.utils_metrics import METRICS
+
+if TYPE_CHECKING:   # annotations seulement : openai reste importé au premier appel
+    from openai import OpenAI
 
 
 # ====== CONFIG ======
 MODEL = "gpt-4o-mini"
 PROCESSED_DIR = Path("data/processed")
 TREATED_DIR = Path("data/treated")
-TREATED_DIR.mkdir(parents=True, exist_ok=True)
+BATCH_DIR = Path("data/batch")
+# dernier batch écrit / soumis : la collecte (jusqu'à 24 h plus tard) ne dépend pas de la date du jour
+BATCH_LATEST = BATCH_DIR / "latest.json"
+TEMPERATURE = 0.4
+# estimation de la réponse, réservée dans le budget tokens/min (pas une limite : la réponse n'est pas tronquée)
+OUTPUT_TOKENS_ESTIMATE = 800
+# ⚠️ incrémenter à chaque modification de build_prompt (invalide le cache des résumés)
+PROMPT_VERSION = "v4"
+# budget max (tokens) du contenu d'un article dans le prompt, après réduction extractive
+CONTENT_TOKEN_BUDGET = int(os.getenv("CONTENT_TOKEN_BUDGET", "1200"))
+PROMPT_ID = f"{PROMPT_VERSION}-b{CONTENT_TOKEN_BUDGET}"
+CACHE_MAX_ENTRIES = 5000
+CACHE_MAX_AGE_DAYS = 90
+
+# 🔹 Client OpenAI et limiteur : créés au premier appel (l'import du module reste sans effet de bord)
+_init_lock = Lock()
+_settings = None
+_client = None
+_limiter = None
+
+
+def api_settings() -> Dict[str, int]:
+    """Réglages d'appel à l'API (lus dans le .env au premier appel ; à ajuster selon le palier du compte)."""
+    global _settings
+    if _settings is None:
+        load_env()
+        _settings = {
+            "concurrency": int(get_env_var("OPENAI_CONCURRENCY", "4")),
+            "max_retries": int(get_env_var("OPENAI_MAX_RETRIES", "5")),
+            "rpm": int(get_env_var("OPENAI_RPM", "500")),
+            "tpm": int(get_env_var("OPENAI_TPM", "200000")),
+        }
+    return _settings
+
+
+def get_client() -> "OpenAI":
+    """
+    Client OpenAI partagé (les 429 sont gérés ici, pas par le SDK).
+    OPENAI_BASE_URL permet de pointer vers un serveur compatible local pour les tests.
+    """
+    global _client
+    with _init_lock:
+        if _client is None:
+            api_settings()
+            from openai import OpenAI
+            _client = OpenAI(api_key=get_env_var("OPENAI_API_KEY"), base_url=get_env_var("OPENAI_BASE_URL"),
+                             max_retries=0)
+            print("🔐 Clé OpenAI chargée depuis .env")
+    return _client
+
+
+def get_limiter() -> RateLimiter:
+    """Limiteur partagé par tous les appels : concurrence, requêtes/min, tokens/min."""
+    global _limiter
+    with _init_lock:
+        if _limiter is None:
+            cfg = api_settings()
+            _limiter = RateLimiter(max_concurrency=cfg["concurrency"], rpm=cfg["rpm"], tpm=cfg["tpm"])
+    return _limiter
 
-# 🔹 Charger les variables d'environnement (.env)
-load_env()
-# 🔹 Initialiser le client OpenAI
-client = OpenAI(api_key=get_env_var("OPENAI_API_KEY"))
-print("🔐 Clé OpenAI chargée depuis .env")
 
 # ====== UTILS ======
-def extract_first_json_block(text: str) -> Optional[str]:
-    """Extrait le premier bloc JSON { ... } d’un texte."""
-    if not text:
-        return None
-
-    fence_matches = list(re.finditer(r"```(?:json)?\s*(.*?)```", text, re.DOTALL | re.IGNORECASE))
-    if fence_matches:
-        content = max((m.group(1) for m in fence_matches), key=lambda s: len(s) if s else 0, default="")
-        text = content or text
-
-    start = text.find("{")
-    if start == -1:
-        return None
-
-    depth = 0
-    for i in range(start, len(text)):
-        c = text[i]
-        if c == "{":
-            depth += 1
-        elif c == "}":
-            depth -= 1
-            if depth == 0:
-                return text[start:i + 1].strip()
-    return None
-
-
 def load_articles(processed_date: str) -> list:
-    """Charge les articles nettoyés du jour, sinon prend le dernier dossier non vide."""
-    fpath = PROCESSED_DIR / processed_date / "articles.json"
-
-    # 🔁 Si pas de fichier aujourd'hui → chercher le dernier existant
-    if not fpath.exists():
-        print(f"⚠️ Aucun fichier pour aujourd’hui ({processed_date}). Recherche du dernier dossier...")
-        dirs = sorted([d for d in PROCESSED_DIR.iterdir() if d.is_dir()], reverse=True)
-        for d in dirs:
-            candidate = d / "articles.json"
-            if candidate.exists():
-                fpath = candidate
-                print(f"📦 Utilisation du dernier fichier disponible : {candidate}")
-                break
-        else:
-            raise FileNotFoundError("Aucun dossier 'processed' trouvé avec articles.json")
-
-    # 🔎 Charger et vérifier
-    with open(fpath, "r", encoding="utf-8") as f:
-        articles = json.load(f)
-
-    if not isinstance(articles, list) or len(articles) == 0:
-        print(f"⚠️ Fichier vide : {fpath}. Recherche d’un autre dossier...")
-        dirs = sorted([d for d in PROCESSED_DIR.iterdir() if d.is_dir()], reverse=True)
-        for d in dirs:
-            if d.name == processed_date:
-                continue
-            candidate = d / "articles.json"
-            if candidate.exists():
-                data = json.loads(candidate.read_text())
-                if isinstance(data, list) and len(data) > 0:
+    """Charge les articles nettoyés du jour, sinon le dernier fichier non vide (via le catalogue)."""
+    catalog = Catalog()
+    try:
+        fpath = catalog.find("processed", day=processed_date)
+
+        # 🔁 Si pas de fichier aujourd'hui → prendre le plus récent
+        if fpath is None:
+            print(f"⚠️ Aucun fichier pour aujourd’hui ({processed_date}). Recherche du dernier fichier...")
+            fpath = catalog.find("processed", nonempty=True)
+            if fpath is None:
+                raise FileNotFoundError("Aucun fichier 'processed' trouvé avec des articles")
+            print(f"📦 Utilisation du dernier fichier disponible : {fpath}")
+
+        # 🔎 Charger et vérifier
+        articles = list(iter_jsonl(fpath))
+
+        if len(articles) == 0:
+            print(f"⚠️ Fichier vide : {fpath}. Recherche d’un autre fichier...")
+            candidate = catalog.find("processed", nonempty=True, exclude_day=processed_date)
+            if candidate is not None:
+                data = list(iter_jsonl(candidate))
+                if len(data) > 0:
                     print(f"✅ Articles trouvés dans {candidate}")
                     return data
-        raise ValueError(f"Aucun article valide trouvé ni pour {processed_date}, ni avant.")
+            raise ValueError(f"Aucun article valide trouvé ni pour {processed_date}, ni avant.")
 
-    return articles
+        return articles
+    finally:
+        catalog.close()
 
 
 
-def build_prompt(article: Dict[str, Any]) -> str:
-    """Construit le prompt JSON strict."""
+def build_prompt(article: Dict[str, Any], stats: Optional[Dict[str, int]] = None) -> str:
+    """
+    Construit le prompt JSON strict.
+    Le contenu est nettoyé du boilerplate et réduit à CONTENT_TOKEN_BUDGET tokens ;
+    si `stats` est fourni, il reçoit les tokens du contenu avant / après.
+    """
     title = article.get("title", "Untitled")
     source = article.get("source", "Unknown")
-    content = article.get("content", "")
+    content, before, after = trim_to_budget(article.get("content", ""), CONTENT_TOKEN_BUDGET, title=title)
+    if stats is not None:
+        stats.update(before=before, after=after)
 
     return f"""
 You are an assistant specialized in summarizing English news articles about AI, art, and technology.
@@ -120,14 +158,46 @@ Content: {content}
 """.strip()
 
 
+def estimate_tokens(prompt: str) -> int:
+    """Tokens du prompt (comptés localement) + réserve pour la réponse."""
+    return count_tokens(prompt) + OUTPUT_TOKENS_ESTIMATE
+
+
+def chat_body(prompt: str) -> Dict[str, Any]:
+    """Corps de la requête chat.completions (partagé par l'appel direct et le mode batch)."""
+    return {
+        "model": MODEL,
+        "messages": [{"role": "user", "content": prompt}],
+        "temperature": TEMPERATURE,
+    }
+
+
 def run_openai(prompt: str) -> str:
-    """Appel à l’API OpenAI."""
-    response = client.chat.completions.create(
-        model=MODEL,
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.4,
-    )
-    return response.choices[0].message.content.strip()
+    """Appel à l’API OpenAI, sous le limiteur de débit, avec backoff sur 429 / erreurs transitoires."""
+    from openai import RateLimitError, APIConnectionError, APITimeoutError, InternalServerError
+    retryable = (RateLimitError, APIConnectionError, APITimeoutError, InternalServerError)
+    client, limiter = get_client(), get_limiter()
+    max_retries = api_settings()["max_retries"]
+    for attempt in range(max_retries + 1):
+        try:
+            with limiter.slot(estimate_tokens(prompt)):
+                t0 = perf_counter()
+                response = client.chat.completions.create(**chat_body(prompt))
+                METRICS.openai_call("summary", MODEL, perf_counter() - t0, response)
+            return response.choices[0].message.content.strip()
+        except retryable as e:
+            if attempt == max_retries:
+                raise
+            resp = getattr(e, "response", None)
+            delay = retry_after_seconds(resp.headers if resp is not None else None)
+            if delay is None:
+                delay = backoff_delay(attempt)
+            if isinstance(e, RateLimitError):
+                # 429 : on suspend tous les appels, pas seulement celui-ci
+                limiter.pause(delay)
+            METRICS.inc("openai_retries", error=type(e).__name__)
+            print(f"⏳ {type(e).__name__}, nouvel essai dans {delay:.1f}s ({attempt + 1}/{max_retries})")
+            sleep(delay)
 
 
 def save_json(data: Dict[str, Any], dest: Path) -> None:
@@ -136,59 +206,350 @@ def save_json(data: Dict[str, Any], dest: Path) -> None:
         json.dump(data, f, ensure_ascii=False, indent=2)
 
 
+def parse_summary(raw: str) -> Dict[str, Any]:
+    """Réponse brute du modèle → dict du résumé (lève ValueError si pas de JSON)."""
+    raw = (raw or "").strip()
+    if not raw.endswith("}"):
+        raw += "}"  # corrige JSON tronqué
+
+    json_block = extract_first_json_block(raw)
+    if not json_block:
+        raise ValueError("Aucun JSON détecté")
+    return json.loads(json_block)
+
+
+class Journal:
+    """
+    Journal JSONL des résumés terminés : une ligne {"key", "summary"} écrite dès
+    qu'un article est fini, pour qu'un crash ne perde pas le travail déjà payé.
+    - resume=True : relit le journal existant (done = {key: résumé})
+    - resume=False : repart d'un journal vide
+    """
+
+    def __init__(self, path: Path, resume: bool = False):
+        self.path = path
+        self.done: Dict[str, Dict[str, Any]] = {}
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if resume and path.exists():
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        continue  # dernière ligne tronquée par un crash
+                    self.done[rec["key"]] = rec["summary"]
+            self._drop_partial_line()
+        elif path.exists():
+            path.unlink()
+        self._lock = Lock()
+        self._f = open(path, "a", encoding="utf-8")
+
+    def _drop_partial_line(self) -> None:
+        """Coupe le fichier après le dernier saut de ligne : la suite s'écrit sur une ligne propre."""
+        with open(self.path, "r+b") as f:
+            data = f.read()
+            if data and not data.endswith(b"\n"):
+                f.truncate(data.rfind(b"\n") + 1)
+
+    def append(self, key: str, summary: Dict[str, Any]) -> None:
+        line = json.dumps({"key": key, "summary": summary}, ensure_ascii=False)
+        with self._lock:
+            self._f.write(line + "\n")
+            self._f.flush()
+            os.fsync(self._f.fileno())
+            self.done[key] = summary
+
+    def close(self) -> None:
+        self._f.close()
+
+
+def article_key(article: Dict[str, Any], local: bool = False) -> str:
+    """Identifiant d'un résumé (cache, journal) : dépend du contenu et du moteur utilisé."""
+    if local:
+        return summary_key(article, "local-textrank", "local", 0.0)
+    return summary_key(article, PROMPT_ID, MODEL, TEMPERATURE)
+
+
+def summarize_article(i: int, total: int, article: Dict[str, Any], cache: Optional[SummaryCache] = None,
+                      journal: Optional[Journal] = None, local: bool = False):
+    """
+    Résume un article (ou le reprend du cache). Retourne (résumé, None) ou (None, erreur).
+    - local=True : résumé extractif local, sans appel API (mode "cheap")
+    """
+    title = article.get("title", "Untitled")
+    try:
+        key = article_key(article, local)
+        if local:
+            parsed = local_summary(article)
+        else:
+            parsed = cache.get(key) if cache else None
+            if parsed is None:
+                stats = {}
+                prompt = build_prompt(article, stats)
+                if stats["before"] > stats["after"]:
+                    print(f"✂️ [{i}/{total}] Contenu réduit : {stats['before']} → {stats['after']} tokens "
+                          f"({stats['before'] - stats['after']} économisés)")
+                parsed = parse_summary(run_openai(prompt))
+                if cache:
+                    cache.put(key, parsed)
+
+        # 🆕 enrichir avec URL et date
+        parsed["url"] = article.get("url", "")
+        parsed["date"] = article.get("date", "")
+        if article.get("also_in"):
+            parsed["also_in"] = article["also_in"]
+        if journal:
+            journal.append(key, parsed)
+
+        print(f"✅ [{i}/{total}] Résumé ajouté : {title[:80]}")
+        return parsed, None
+
+    except Exception as e:
+        print(f"⚠️ [{i}/{total}] Erreur sur l’article {i}: {e}")
+        return None, {"index": i, "title": title, "error": str(e)}
+
+
 # ====== MAIN ======
-def main():
+def main(resume: bool = False, local: bool = False):
+    """
+    Résume les articles du jour.
+    - resume=True : reprend le journal du jour et ne traite que les articles manquants
+    - local=True  : résumés extractifs locaux, sans API (aperçus, tests)
+    """
     today = date.today().strftime("%d-%m-%Y")
     print(f"🧠 Chargement des articles du {today}…")
     articles = load_articles(today)
 
-    results = []
-    errors = []
-
-    for i, article in enumerate(articles, start=1):
-        title = article.get("title", "Untitled")
-        print(f"\n📰 [{i}/{len(articles)}] {title[:80]}")
-
-        try:
-            prompt = build_prompt(article)
-            raw = run_openai(prompt)
-
-            if not raw.strip().endswith("}"):
-                raw += "}"  # corrige JSON tronqué
-
-            json_block = extract_first_json_block(raw)
-            if not json_block:
-                raise ValueError("Aucun JSON détecté")
-
-            parsed = json.loads(json_block)
-
-            # 🆕 enrichir avec URL et date
-            parsed["url"] = article.get("url", "")
-            parsed["date"] = article.get("date", "")
-
-            results.append(parsed)
-            print("✅ Résumé ajouté")
-
-        except Exception as e:
-            print(f"⚠️ Erreur sur l’article {i}: {e}")
-            errors.append({"index": i, "title": title, "error": str(e)})
-
-        sleep(1)  # pause pour éviter de saturer l’API
-
-    # Sauvegarde
+    journal = Journal(TREATED_DIR / today / "journal.jsonl", resume=resume)
+    keys = [article_key(a, local) for a in articles]
+    todo = [(i, a) for i, (a, k) in enumerate(zip(articles, keys), start=1) if k not in journal.done]
+    if resume:
+        print(f"♻️ Reprise : {len(articles) - len(todo)} résumés déjà dans le journal")
+
+    # 🔹 Cache des résumés déjà payés (reprise après échec, repli sur un ancien dossier)
+    cache = SummaryCache()
+    evicted = cache.evict(max_entries=CACHE_MAX_ENTRIES, max_age_days=CACHE_MAX_AGE_DAYS)
+    if evicted:
+        print(f"🧹 {evicted} résumés expirés retirés du cache")
+
+    # 🔹 Appels en parallèle (limités par get_limiter()), chaque résumé est journalisé dès qu'il est prêt
+    total = len(articles)
+    if local:
+        print(f"🏠 {len(todo)} articles à résumer localement (sans API)")
+        errors = [err for parsed, err in (summarize_article(i, total, a, journal=journal, local=True) for i, a in todo)
+                  if parsed is None]
+    else:
+        concurrency = api_settings()["concurrency"]
+        print(f"🚀 {len(todo)} articles à résumer ({concurrency} requêtes simultanées max)")
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            outcomes = pool.map(lambda ia: summarize_article(ia[0], total, ia[1], cache, journal), todo)
+            errors = [err for parsed, err in outcomes if parsed is None]
+    print(f"🗃️ Cache des résumés : {cache.stats()}")
+    METRICS.inc("summary_cache", cache.hits, result="hit")
+    METRICS.inc("summary_cache", cache.misses, result="miss")
+    cache.close()
+    journal.close()
+
+    # les résumés sont reconstruits depuis le journal, dans l'ordre des articles
+    results = [journal.done[k] for k in keys if k in journal.done]
+    save_outputs(today, results, errors)
+
+
+def summary_errors(today: str) -> list:
+    """Fichiers errors.jsonl* du jour (articles dont le résumé a échoué)."""
+    return sorted((TREATED_DIR / today).glob("errors.jsonl*"))
+
+
+def save_outputs(today: str, results: list, errors: list) -> None:
+    """
+    Écrit summaries (+ errors s'il y a des erreurs) en JSONL compressé dans data/treated/<date>/.
+    Sans erreur, un errors laissé par une exécution précédente du jour est supprimé.
+    """
     out_dir = TREATED_DIR / today
-    out_dir.mkdir(parents=True, exist_ok=True)
-    out_path = out_dir / "summaries.json"
-    save_json(results, out_path)
+    out_path = write_jsonl(out_dir / f"summaries{data_suffix()}", results)
+    catalog = Catalog()
+    catalog.register("treated", out_path, today, records=results)
+    catalog.close()
     print(f"\n💾 {len(results)} résumés sauvegardés dans {out_path}")
 
     if errors:
-        err_path = out_dir / "errors.json"
-        save_json(errors, err_path)
+        err_path = write_jsonl(out_dir / f"errors{data_suffix()}", errors)
         print(f"⚠️ {len(errors)} erreurs sauvegardées dans {err_path}")
+    else:
+        for stale in summary_errors(today):
+            stale.unlink()
 
     print("\n🎯 Traitement terminé.")
 
 
+# ====== MODE BATCH (Batch API : -50 % de coût, pas de limite par requête) ======
+def write_batch(processed_date: Optional[str] = None) -> Path:
+    """
+    Écrit les requêtes de résumé au format Batch API (JSONL) dans data/batch/<date>/,
+    avec un index (meta.json) pour recomposer les résumés à la collecte.
+    Les articles déjà présents dans le cache ne génèrent pas de requête.
+    """
+    today = processed_date or date.today().strftime("%d-%m-%Y")
+    articles = load_articles(today)
+    out_dir = BATCH_DIR / today
+    out_dir.mkdir(parents=True, exist_ok=True)
+    req_path = out_dir / "requests.jsonl"
+
+    cache = SummaryCache()
+    meta, n_requests, saved = [], 0, 0
+    with open(req_path, "w", encoding="utf-8") as f:
+        for i, article in enumerate(articles, start=1):
+            key = summary_key(article, PROMPT_ID, MODEL, TEMPERATURE)
+            entry = {"index": i, "custom_id": f"art-{i}", "key": key,
+                     "title": article.get("title", "Untitled"),
+                     "url": article.get("url", ""), "date": article.get("date", ""),
+                     "also_in": article.get("also_in", [])}
+            meta.append(entry)
+            if cache.get(key) is not None:
+                continue
+            stats = {}
+            prompt = build_prompt(article, stats)
+            f.write(json.dumps({
+                "custom_id": entry["custom_id"],
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": chat_body(prompt),
+            }, ensure_ascii=False) + "\n")
+            n_requests += 1
+            saved += stats["before"] - stats["after"]
+    cache.close()
+    save_json({"date": today, "articles": meta}, out_dir / "meta.json")
+    save_json({"date": today, "dir": str(out_dir), "batch_id": None}, BATCH_LATEST)
+    print(f"📦 {n_requests} requêtes batch écrites dans {req_path} ({len(meta) - n_requests} déjà en cache, {saved} tokens de contenu économisés)")
+    return req_path
+
+
+def submit_batch(req_path: Path) -> str:
+    """Envoie le fichier JSONL à l'API Batch et retourne l'identifiant du batch."""
+    with open(req_path, "rb") as f:
+        uploaded = get_client().files.create(file=f, purpose="batch")
+    batch = get_client().batches.create(input_file_id=uploaded.id, endpoint="/v1/chat/completions",
+                                  completion_window="24h")
+    print(f"🚀 Batch soumis : {batch.id}")
+    # l'identifiant est rangé avec l'index du batch et dans le pointeur latest.json
+    meta_path = req_path.parent / "meta.json"
+    meta = json.loads(meta_path.read_text(encoding="utf-8"))
+    meta["batch_id"] = batch.id
+    save_json(meta, meta_path)
+    save_json({"date": meta["date"], "dir": str(req_path.parent), "batch_id": batch.id}, BATCH_LATEST)
+    return batch.id
+
+
+def find_batch_dir(batch_id: Optional[str] = None) -> Path:
+    """
+    Dossier d'un batch (celui qui contient meta.json) :
+    - batch_id : le dossier dont meta.json porte cet identifiant
+    - sinon    : le dernier batch écrit (data/batch/latest.json)
+    """
+    if batch_id:
+        for meta_path in sorted(BATCH_DIR.glob("*/meta.json")):
+            if json.loads(meta_path.read_text(encoding="utf-8")).get("batch_id") == batch_id:
+                return meta_path.parent
+    if BATCH_LATEST.exists():
+        latest = json.loads(BATCH_LATEST.read_text(encoding="utf-8"))
+        if not batch_id or latest.get("batch_id") in (None, batch_id):
+            return Path(latest["dir"])
+    raise FileNotFoundError(f"Aucun batch trouvé{f' pour {batch_id}' if batch_id else ''} dans {BATCH_DIR}")
+
+
+def download_batch(batch_id: str, dest: Path) -> Optional[Path]:
+    """Télécharge le fichier de résultats si le batch est terminé, sinon None."""
+    batch = get_client().batches.retrieve(batch_id)
+    print(f"📡 Batch {batch_id} : {batch.status}")
+    if batch.status != "completed" or not batch.output_file_id:
+        return None
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    dest.write_bytes(get_client().files.content(batch.output_file_id).read())
+    return dest
+
+
+def collect_batch(results_path: Path, meta_path: Path) -> None:
+    """
+    Transforme un fichier de résultats Batch API en résumés / erreurs.
+    Les résumés sont rangés au jour de la collecte (celui de la newsletter qui les utilisera),
+    pas au jour où les articles ont été écrits dans le batch.
+    """
+    meta = json.loads(meta_path.read_text(encoding="utf-8"))
+    outputs = {}
+    with open(results_path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                rec = json.loads(line)
+                outputs[rec.get("custom_id")] = rec
+
+    cache = SummaryCache()
+    results, errors = [], []
+    for entry in meta["articles"]:
+        try:
+            parsed = cache.get(entry["key"])
+            if parsed is None:
+                rec = outputs.get(entry["custom_id"])
+                if rec is None:
+                    raise ValueError("Aucun résultat batch pour cet article")
+                resp = rec.get("response") or {}
+                if rec.get("error") or resp.get("status_code") != 200:
+                    raise ValueError(f"Erreur batch : {rec.get('error') or resp.get('status_code')}")
+                parsed = parse_summary(resp["body"]["choices"][0]["message"]["content"])
+                usage = resp["body"].get("usage") or {}
+                METRICS.inc("openai_prompt_tokens", usage.get("prompt_tokens", 0), purpose="batch", model=MODEL)
+                METRICS.inc("openai_completion_tokens", usage.get("completion_tokens", 0), purpose="batch", model=MODEL)
+                cache.put(entry["key"], parsed)
+            parsed["url"] = entry["url"]
+            parsed["date"] = entry["date"]
+            if entry.get("also_in"):
+                parsed["also_in"] = entry["also_in"]
+            results.append(parsed)
+        except Exception as e:
+            errors.append({"index": entry["index"], "title": entry["title"], "error": str(e)})
+    print(f"🗃️ Cache des résumés : {cache.stats()}")
+    cache.close()
+
+    today = date.today().strftime("%d-%m-%Y")
+    if meta["date"] != today:
+        print(f"📅 Articles du {meta['date']}, résumés rangés au {today}")
+    save_outputs(today, results, errors)
+
+
 if __name__ == "__main__":
-    main()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Résumés des articles du jour")
+    parser.add_argument("--batch-write", action="store_true", help="écrit les requêtes au format Batch API")
+    parser.add_argument("--batch-submit", action="store_true", help="avec --batch-write : soumet le fichier")
+    parser.add_argument("--batch-collect", metavar="RESULTS", nargs="?", const="",
+                        help="ingère un fichier de résultats Batch API (ou le télécharge avec --batch-id)")
+    parser.add_argument("--batch-id", help="identifiant du batch à télécharger (défaut : le dernier soumis)")
+    parser.add_argument("--date", help="dossier à traiter (jj-mm-aaaa), par défaut aujourd'hui")
+    parser.add_argument("--local", action="store_true",
+                        help="résumés extractifs locaux, sans appel à l'API (aperçus, tests)")
+    parser.add_argument("--resume", action="store_true",
+                        help="reprend le journal du jour et ne résume que les articles manquants")
+    args = parser.parse_args()
+
+    try:
+        day = args.date or date.today().strftime("%d-%m-%Y")
+        if args.batch_write:
+            path = write_batch(day)
+            if args.batch_submit:
+                submit_batch(path)
+        elif args.batch_collect is not None:
+            # le batch est retrouvé par son identifiant (ou le dernier écrit), pas par la date du jour
+            batch_dir = BATCH_DIR / args.date if args.date else find_batch_dir(args.batch_id)
+            batch_id = args.batch_id
+            if batch_id is None and not args.batch_collect:
+                batch_id = json.loads((batch_dir / "meta.json").read_text(encoding="utf-8")).get("batch_id")
+            results_file = Path(args.batch_collect) if args.batch_collect else batch_dir / "results.jsonl"
+            if batch_id:
+                results_file = download_batch(batch_id, results_file)
+                if results_file is None:
+                    raise SystemExit("⏳ Batch pas encore terminé.")
+            collect_batch(results_file, batch_dir / "meta.json")
+        else:
+            main(resume=args.resume, local=args.local)
+    finally:
+        METRICS.flush("traitement")
@@ -0,0 +1,231 @@
+# utils_browser.py
+import asyncio, atexit, importlib.util, logging, sys, threading, time
+from urllib.parse import urlparse
+
+# playwright n'est importé qu'au démarrage du navigateur (premier rendu)
+PLAYWRIGHT_AVAILABLE = importlib.util.find_spec("playwright") is not None
+
+# un seul Chromium par exécution, partagé par tous les threads de scraping
+
+# ressources inutiles pour extraire du texte (types Playwright ; "other" reste autorisé :
+# beacons, manifestes, etc. servent parfois à charger le contenu)
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font", "stylesheet"}
+# délai fixe utilisé quand le sélecteur attendu n'apparaît jamais sur un domaine (ancien comportement)
+FALLBACK_WAIT_MS = 2000
+# traqueurs / régies tierces (suffixes d'hôte)
+BLOCKED_HOSTS = (
+    "doubleclick.net", "googlesyndication.com", "googletagmanager.com", "google-analytics.com",
+    "googletagservices.com", "adservice.google.com", "amazon-adsystem.com", "facebook.net",
+    "facebook.com", "connect.facebook.net", "scorecardresearch.com", "chartbeat.com",
+    "chartbeat.net", "taboola.com", "outbrain.com", "hotjar.com", "quantserve.com",
+    "criteo.com", "criteo.net", "adnxs.com", "pubmatic.com", "rubiconproject.com",
+    "moatads.com", "parsely.com", "segment.io", "newrelic.com", "nr-data.net",
+    "permutive.com", "bounceexchange.com", "cookielaw.org", "onetrust.com",
+)
+
+
+def is_blocked(resource_type: str, url: str) -> bool:
+    """Vrai si la requête est une ressource lourde ou un traqueur tiers."""
+    if resource_type in BLOCKED_RESOURCE_TYPES:
+        return True
+    host = (urlparse(url).hostname or "").lower()
+    return any(host == h or host.endswith("." + h) for h in BLOCKED_HOSTS)
+
+
+class BrowserPool:
+    """
+    Navigateur Playwright unique et long-vivant, avec un pool de pages.
+    - le navigateur tourne dans une boucle asyncio dédiée (thread de fond)
+    - n'importe quel thread peut appeler render(url) : il emprunte une page libre,
+      plusieurs pages se rendent donc en même temps
+    - démarrage paresseux au premier rendu, fermeture via close() (ou à la sortie)
+    - block_resources : intercepte et annule images, polices, médias, CSS et traqueurs
+    - selectors : mémoire (SelectorMemory) des sélecteurs jamais trouvés par domaine ; ils ne sont
+      plus attendus, un délai fixe court (FALLBACK_WAIT_MS) les remplace
+    """
+
+    def __init__(self, contexts=2, pages_per_context=2, user_agent=None, headless=True, block_resources=True,
+                 selectors=None):
+        self.contexts = contexts
+        self.pages_per_context = pages_per_context
+        self.user_agent = user_agent
+        self.headless = headless
+        self.block_resources = block_resources
+        self.selectors = selectors
+        self.blocked = 0
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+        self._pw = None
+        self._browser = None
+        self._pages = None
+
+    @property
+    def size(self) -> int:
+        return self.contexts * self.pages_per_context
+
+    def start(self):
+        """Lance la boucle et le navigateur si ce n'est pas déjà fait."""
+        with self._lock:
+            if self._loop is not None:
+                return
+            if not PLAYWRIGHT_AVAILABLE:
+                raise RuntimeError("Playwright not available.")
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name="browser-pool", daemon=True)
+            thread.start()
+            try:
+                asyncio.run_coroutine_threadsafe(self._start(), loop).result()
+            except Exception:
+                loop.call_soon_threadsafe(loop.stop)
+                raise
+            self._loop, self._thread = loop, thread
+            atexit.register(self.close)
+            logging.info("Browser pool ready (%d pages).", self.size)
+
+    async def _start(self):
+        from playwright.async_api import async_playwright
+        self._pw = await async_playwright().start()
+        self._browser = await self._pw.chromium.launch(headless=self.headless)
+        self._pages = asyncio.Queue()
+        for _ in range(self.contexts):
+            ctx = await self._browser.new_context(user_agent=self.user_agent)
+            if self.block_resources:
+                await ctx.route("**/*", self._route)
+            for _ in range(self.pages_per_context):
+                self._pages.put_nowait(await ctx.new_page())
+
+    async def _route(self, route):
+        req = route.request
+        if is_blocked(req.resource_type, req.url):
+            self.blocked += 1
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def _goto(self, page, url, timeout, wait_ms, wait_for, wait_until, selector_timeout):
+        await page.goto(url, timeout=timeout, wait_until=wait_until)
+        host = (urlparse(url).hostname or "").lower()
+        if wait_for and self.selectors is not None and self.selectors.skip(host, wait_for):
+            # ce sélecteur n'apparaît jamais sur ce domaine : inutile d'attendre tout le timeout
+            wait_for, wait_ms = None, wait_ms or FALLBACK_WAIT_MS
+        if wait_for:
+            # attente "intelligente" : dès que le contenu est là, sans délai fixe
+            try:
+                await page.wait_for_selector(wait_for, timeout=selector_timeout)
+                matched = True
+            except Exception:
+                logging.info("Selector %r not found on %s, using current DOM", wait_for, url)
+                matched = False
+            if self.selectors is not None:
+                self.selectors.record(host, wait_for, matched)
+        elif wait_ms:
+            await page.wait_for_timeout(wait_ms)
+
+    async def _render(self, url, timeout, wait_ms, wait_for, wait_until, selector_timeout):
+        page = await self._pages.get()
+        try:
+            await self._goto(page, url, timeout, wait_ms, wait_for, wait_until, selector_timeout)
+            return await page.content()
+        finally:
+            self._pages.put_nowait(page)
+
+    def render(self, url: str, timeout=20000, wait_ms=0, wait_for=None,
+               wait_until="domcontentloaded", selector_timeout=4000) -> str:
+        """
+        Rend `url` sur une page du pool et retourne le HTML (bloquant, thread-safe).
+        - wait_for : sélecteur CSS attendu (ex. "article p") au lieu d'un délai fixe
+        - wait_ms  : délai fixe, utilisé seulement sans wait_for
+        - wait_until : événement de navigation ("domcontentloaded", "load", ...)
+        """
+        self.start()
+        coro = self._render(url, timeout, wait_ms, wait_for, wait_until, selector_timeout)
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    async def _measure(self, url, **opts):
+        page = await self._pages.get()
+        stats = {"bytes": 0, "requests": 0}
+
+        async def _count(request):
+            try:
+                sizes = await request.sizes()
+                stats["bytes"] += sizes["responseBodySize"] + sizes["responseHeadersSize"]
+            except Exception:
+                pass
+            stats["requests"] += 1
+
+        tasks = []
+        listener = lambda r: tasks.append(asyncio.ensure_future(_count(r)))
+        page.on("requestfinished", listener)
+        try:
+            blocked_before = self.blocked
+            t0 = time.perf_counter()
+            await self._goto(page, url, **opts)
+            stats["ms"] = (time.perf_counter() - t0) * 1000
+            if tasks:
+                await asyncio.gather(*tasks)
+            stats["blocked"] = self.blocked - blocked_before
+            return stats
+        finally:
+            page.remove_listener("requestfinished", listener)
+            self._pages.put_nowait(page)
+
+    def measure(self, url: str, timeout=30000, wait_ms=0, wait_for=None,
+                wait_until="domcontentloaded", selector_timeout=4000) -> dict:
+        """Comme render, mais retourne {ms, bytes, requests, blocked} pour le benchmark."""
+        self.start()
+        coro = self._measure(url, timeout=timeout, wait_ms=wait_ms, wait_for=wait_for,
+                             wait_until=wait_until, selector_timeout=selector_timeout)
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    async def _close(self):
+        if self._browser is not None:
+            await self._browser.close()
+        if self._pw is not None:
+            await self._pw.stop()
+        self._browser = self._pw = self._pages = None
+
+    def close(self):
+        """Ferme le navigateur et arrête la boucle (sans effet si jamais démarré)."""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            if loop is None:
+                return
+            try:
+                asyncio.run_coroutine_threadsafe(self._close(), loop).result(timeout=30)
+            except Exception as e:
+                logging.warning("Browser pool close failed: %s", e)
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout=5)
+            loop.close()
+            self._loop = self._thread = None
+
+
+def bench(urls, wait_for="article p"):
+    """
+    Compare, page par page, le rendu historique (tout charger + 2 s fixes)
+    au rendu optimisé (blocage des ressources + attente du sélecteur).
+    """
+    baseline = BrowserPool(contexts=1, pages_per_context=1, block_resources=False)
+    fast = BrowserPool(contexts=1, pages_per_context=1, block_resources=True)
+    rows = []
+    try:
+        for url in urls:
+            a = baseline.measure(url, wait_until="load", wait_ms=2000)
+            b = fast.measure(url, wait_for=wait_for)
+            rows.append((url, a, b))
+            print(f"{url}\n  baseline: {a['ms']:8.0f} ms {a['bytes'] / 1024:9.0f} KiB {a['requests']:4d} req"
+                  f"\n  blocked : {b['ms']:8.0f} ms {b['bytes'] / 1024:9.0f} KiB {b['requests']:4d} req"
+                  f" ({b['blocked']} bloquées)"
+                  f"\n  saved   : {a['ms'] - b['ms']:8.0f} ms {(a['bytes'] - b['bytes']) / 1024:9.0f} KiB")
+    finally:
+        baseline.close()
+        fast.close()
+    return rows
+
+
+if __name__ == "__main__":
+    # python -m src.utils.utils_browser URL [URL ...]
+    if len(sys.argv) < 2:
+        sys.exit("usage: python -m src.utils.utils_browser URL [URL ...]")
+    bench(sys.argv[1:])
@@ -0,0 +1,89 @@
+# utils_cache.py
+import hashlib, json, sqlite3, threading, time
+from pathlib import Path
+
+# cache des résumés adressé par contenu : même article + même prompt + même modèle = même résumé
+
+DEFAULT_DB = Path("data/cache/summaries.sqlite3")
+DAY = 86400
+
+
+def summary_key(article: dict, prompt_version: str, model: str, temperature: float) -> str:
+    """Empreinte sha256 du contenu de l'article et des paramètres de génération."""
+    payload = {
+        "title": (article.get("title") or "").strip(),
+        "source": (article.get("source") or "").strip(),
+        "content": (article.get("content") or "").strip(),
+        "prompt": prompt_version,
+        "model": model,
+        "temperature": temperature,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+class SummaryCache:
+    """
+    Cache persistant (SQLite) des résumés déjà payés.
+    - get / put par clé (voir summary_key), compteurs hits / misses
+    - evict : supprime les entrées plus vieilles que max_age_days,
+      puis les moins récemment utilisées au-delà de max_entries
+    """
+
+    def __init__(self, path=DEFAULT_DB):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS summaries ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL, last_used REAL NOT NULL"
+            ")"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS summaries_last_used ON summaries(last_used)")
+        self._db.commit()
+
+    def get(self, key: str):
+        with self._lock:
+            row = self._db.execute("SELECT value FROM summaries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._db.execute("UPDATE summaries SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+        return json.loads(row[0])
+
+    def put(self, key: str, value: dict):
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO summaries(key, value, created, last_used) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), now, now),
+            )
+            self._db.commit()
+
+    def evict(self, max_entries=5000, max_age_days=90) -> int:
+        """Retourne le nombre d'entrées supprimées."""
+        with self._lock:
+            before = self._db.total_changes
+            if max_age_days is not None:
+                self._db.execute("DELETE FROM summaries WHERE created < ?", (time.time() - max_age_days * DAY,))
+            if max_entries is not None:
+                self._db.execute(
+                    "DELETE FROM summaries WHERE key NOT IN "
+                    "(SELECT key FROM summaries ORDER BY last_used DESC LIMIT ?)",
+                    (max_entries,),
+                )
+            self._db.commit()
+            return self._db.total_changes - before
+
+    def stats(self) -> str:
+        total = self.hits + self.misses
+        rate = (100.0 * self.hits / total) if total else 0.0
+        return f"{self.hits} hits / {self.misses} misses ({rate:.0f}% hit)"
+
+    def close(self):
+        with self._lock:
+            self._db.close()
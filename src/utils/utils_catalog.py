@@ -0,0 +1,240 @@
+# utils_catalog.py
+import hashlib, os, sqlite3, threading, time
+from datetime import date, datetime
+from pathlib import Path
+from src.utils.utils_clean import canonical_url
+from src.utils.utils_io import iter_jsonl, find_data_file, record_hash, READ_ORDER
+
+# catalogue des fichiers produits par le pipeline (SQLite) : brut, nettoyé, résumés, newsletters
+# indexés par vraie date, source, URL canonique et empreinte → plus de parcours de dossiers
+
+DEFAULT_DB = Path("data/cache/catalog.sqlite3")
+DATA_ROOT = Path("data")
+# identifiant de l'exécution courante (un lancement du pipeline ou d'une étape)
+RUN_ID = f"{datetime.now():%Y%m%dT%H%M%S}-{os.getpid()}"
+
+KINDS = ("raw", "processed", "treated", "newsletter")
+
+
+def iso_day(value=None) -> str:
+    """date, 'jj-mm-aaaa' ou 'aaaa-mm-jj' → 'aaaa-mm-jj' (aujourd'hui par défaut)."""
+    if value is None:
+        return date.today().isoformat()
+    if isinstance(value, (date, datetime)):
+        return value.strftime("%Y-%m-%d")
+    for fmt in ("%d-%m-%Y", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(value[:10], fmt).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    raise ValueError(f"Date illisible : {value}")
+
+
+class Catalog:
+    """
+    Index persistant des artefacts du pipeline.
+    - register       : enregistre un fichier (type, jour, nombre d'articles, empreinte) et ses articles (URL, source)
+    - find           : dernier fichier d'un type (pour un jour donné, ou le plus récent non vide)
+    - records_for_url: tous les enregistrements d'une URL (ex. tous ses résumés)
+    Reconstruit depuis data/ s'il est vide (premier lancement, base supprimée).
+    """
+
+    def __init__(self, path=DEFAULT_DB, root=DATA_ROOT):
+        self.path = Path(path)
+        self.root = Path(root)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS artifacts ("
+            " path TEXT PRIMARY KEY, kind TEXT NOT NULL, day TEXT NOT NULL, run TEXT NOT NULL,"
+            " records INTEGER NOT NULL, hash TEXT NOT NULL, created REAL NOT NULL"
+            ")"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS items ("
+            " artifact TEXT NOT NULL, position INTEGER NOT NULL, url TEXT NOT NULL,"
+            " source TEXT NOT NULL DEFAULT '', hash TEXT NOT NULL,"
+            " PRIMARY KEY (artifact, position)"
+            ") WITHOUT ROWID"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS artifacts_kind_day ON artifacts(kind, day, created)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS items_url ON items(url)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS items_source ON items(source)")
+        self._db.commit()
+        if self._count() == 0:
+            self.rebuild()
+
+    def _count(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM artifacts").fetchone()[0]
+
+    def register(self, kind: str, path, day=None, records=None, created=None, run=RUN_ID) -> int:
+        """
+        Indexe un fichier ; `records` = articles déjà en mémoire (sinon relus depuis le fichier).
+        Ré-enregistrer un même chemin remplace son entrée. Retourne le nombre d'articles indexés.
+        """
+        path = Path(path)
+        if kind == "newsletter":
+            digest = hashlib.sha256(path.read_bytes()).hexdigest()
+            rows = []
+        else:
+            records = iter_jsonl(path) if records is None else records
+            rows, h = [], hashlib.sha256()
+            for pos, rec in enumerate(records):
+                rh = record_hash(rec)
+                h.update(rh.encode())
+                rows.append((str(path), pos, canonical_url(rec.get("url", "")), rec.get("source") or "", rh))
+            digest = h.hexdigest()
+        with self._lock:
+            self._db.execute("DELETE FROM items WHERE artifact = ?", (str(path),))
+            self._db.execute(
+                "INSERT OR REPLACE INTO artifacts(path, kind, day, run, records, hash, created)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (str(path), kind, iso_day(day), run, len(rows), digest, created or time.time()),
+            )
+            self._db.executemany(
+                "INSERT INTO items(artifact, position, url, source, hash) VALUES (?, ?, ?, ?, ?)", rows
+            )
+            self._db.commit()
+        return len(rows)
+
+    def forget(self, path):
+        with self._lock:
+            self._db.execute("DELETE FROM items WHERE artifact = ?", (str(path),))
+            self._db.execute("DELETE FROM artifacts WHERE path = ?", (str(path),))
+            self._db.commit()
+
+    def find(self, kind: str, day=None, nonempty=False, exclude_day=None):
+        """
+        Dernier fichier d'un type, trié par vraie date puis heure d'écriture.
+        - day         : seulement ce jour
+        - nonempty    : ignore les fichiers sans article
+        - exclude_day : ignore ce jour
+        Les entrées dont le fichier a disparu sont retirées au passage. None si rien ne correspond.
+        """
+        sql, args = "SELECT path FROM artifacts WHERE kind = ?", [kind]
+        if day is not None:
+            sql += " AND day = ?"
+            args.append(iso_day(day))
+        if exclude_day is not None:
+            sql += " AND day != ?"
+            args.append(iso_day(exclude_day))
+        if nonempty:
+            sql += " AND records > 0"
+        sql += " ORDER BY day DESC, created DESC"
+        with self._lock:
+            paths = [Path(p) for (p,) in self._db.execute(sql, args).fetchall()]
+        for p in paths:
+            if p.exists():
+                return p
+            self.forget(p)
+        return None
+
+    def digest(self, path):
+        """Empreinte de contenu enregistrée pour un fichier (None s'il n'est pas catalogué)."""
+        with self._lock:
+            row = self._db.execute("SELECT hash FROM artifacts WHERE path = ?", (str(path),)).fetchone()
+        return row[0] if row else None
+
+    def artifacts(self, kind: str = None, day=None) -> list:
+        """[(chemin, type, jour, run, nombre, empreinte)] du plus récent au plus ancien."""
+        sql, args = "SELECT path, kind, day, run, records, hash FROM artifacts WHERE 1=1", []
+        if kind:
+            sql += " AND kind = ?"
+            args.append(kind)
+        if day is not None:
+            sql += " AND day = ?"
+            args.append(iso_day(day))
+        with self._lock:
+            return self._db.execute(sql + " ORDER BY day DESC, created DESC", args).fetchall()
+
+    def lookup_url(self, url: str, kind: str = None) -> list:
+        """[(chemin, jour, position)] des enregistrements d'une URL (canonisée), du plus récent au plus ancien."""
+        sql = ("SELECT i.artifact, a.day, i.position FROM items i JOIN artifacts a ON a.path = i.artifact"
+               " WHERE i.url = ?")
+        args = [canonical_url(url)]
+        if kind:
+            sql += " AND a.kind = ?"
+            args.append(kind)
+        with self._lock:
+            return self._db.execute(sql + " ORDER BY a.day DESC, a.created DESC", args).fetchall()
+
+    def records_for_url(self, url: str, kind: str = "treated") -> list:
+        """Les enregistrements eux-mêmes (ex. tous les résumés d'un article), relus à leur position."""
+        out = []
+        for path, day, position in self.lookup_url(url, kind):
+            if not Path(path).exists():
+                continue
+            for pos, rec in enumerate(iter_jsonl(path)):
+                if pos == position:
+                    out.append(dict(rec, _day=day, _artifact=path))
+                    break
+        return out
+
+    def rebuild(self) -> int:
+        """Réindexe tout le dossier data/ (dates lues dans les noms de dossiers). Retourne le nombre de fichiers."""
+        n = 0
+        for kind, stem in (("processed", "articles"), ("treated", "summaries")):
+            base = self.root / kind
+            for folder in (sorted(base.iterdir()) if base.exists() else []):
+                path = find_data_file(folder, stem) if folder.is_dir() else None
+                if path is None:
+                    continue
+                try:
+                    self.register(kind, path, folder.name, created=path.stat().st_mtime, run="rebuild")
+                    n += 1
+                except (ValueError, OSError) as e:
+                    print(f"⚠️ Catalogue : {path} ignoré ({e})")
+        raw = self.root / "raw"
+        for folder in (sorted(raw.iterdir()) if raw.exists() else []):
+            if not folder.is_dir():
+                continue
+            for path in sorted(folder.iterdir()):
+                if not path.name.endswith(READ_ORDER):
+                    continue
+                try:
+                    self.register("raw", path, folder.name, created=path.stat().st_mtime, run="rebuild")
+                    n += 1
+                except (ValueError, OSError) as e:
+                    print(f"⚠️ Catalogue : {path} ignoré ({e})")
+        newsletters = self.root / "newsletters"
+        for path in (sorted(newsletters.glob("newsletter_*.html")) if newsletters.exists() else []):
+            stamp = path.stat().st_mtime
+            try:
+                day = iso_day(path.stem[len("newsletter_"):])
+            except ValueError:
+                day = iso_day(datetime.fromtimestamp(stamp))
+            self.register("newsletter", path, day, created=stamp, run="rebuild")
+            n += 1
+        if n:
+            print(f"📇 Catalogue reconstruit : {n} fichiers indexés")
+        return n
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Catalogue des données du pipeline")
+    parser.add_argument("--rebuild", action="store_true", help="vide et réindexe le dossier data/")
+    parser.add_argument("--url", help="tous les résumés connus pour cette URL")
+    args = parser.parse_args()
+
+    catalog = Catalog()
+    if args.rebuild:
+        with catalog._lock:
+            catalog._db.execute("DELETE FROM items")
+            catalog._db.execute("DELETE FROM artifacts")
+            catalog._db.commit()
+        catalog.rebuild()
+    if args.url:
+        for rec in catalog.records_for_url(args.url):
+            print(f"{rec['_day']}  {rec.get('title', '')}\n    {rec.get('summary', '')}")
+    else:
+        for path, kind, day, run, records, _ in catalog.artifacts()[:20]:
+            print(f"{day}  {kind:<10} {records:>4}  {path}")
+    catalog.close()
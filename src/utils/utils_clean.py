@@ -1,4 +1,7 @@
+import re
 from hashlib import md5
+from typing import Optional
+from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
 
 
 # verifie si un artile existe déja ou pas et agit en conséquences
@@ -18,8 +21,56 @@ def normalize_articles(articles):
             "title": art.get("title", "").strip(),
             "url": url,
             "summary": (art.get("summary") or "").strip(),
+            "content": (art.get("content") or "").strip(),
             "image": (art.get("image") or "").strip(),
             "date": (art.get("date") or "").strip(),
             "source": art.get("source", "Artnet")
         })
     return cleaned
+
+
+def canonical_url(u: str) -> str:
+    """Nettoie les URLs (enlève tracking, fragments, normalise)"""
+    if not u:
+        return ""
+    u = u.strip()
+    p = urlparse(u)
+    path = p.path[:-1] if p.path.endswith("/") and p.path != "/" else p.path
+    blacklist = {"utm_source","utm_medium","utm_campaign","utm_term","utm_content",
+                 "gclid","fbclid","ref","mc_cid","mc_eid"}
+    q = [(k, v) for k, v in parse_qsl(p.query, keep_blank_values=True) if k.lower() not in blacklist]
+    canon = urlunparse((
+        p.scheme.lower(),
+        p.netloc.lower(),
+        path,
+        "",  # params
+        urlencode(q, doseq=True),
+        ""   # fragment
+    ))
+    return canon
+
+
+def extract_first_json_block(text: str) -> Optional[str]:
+    """Extrait le premier bloc JSON { ... } d’un texte."""
+    if not text:
+        return None
+
+    fence_matches = list(re.finditer(r"```(?:json)?\s*(.*?)```", text, re.DOTALL | re.IGNORECASE))
+    if fence_matches:
+        content = max((m.group(1) for m in fence_matches), key=lambda s: len(s) if s else 0, default="")
+        text = content or text
+
+    start = text.find("{")
+    if start == -1:
+        return None
+
+    depth = 0
+    for i in range(start, len(text)):
+        c = text[i]
+        if c == "{":
+            depth += 1
+        elif c == "}":
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1].strip()
+    return None
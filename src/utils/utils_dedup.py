@@ -0,0 +1,108 @@
+# utils_dedup.py
+import re, zlib
+from collections import defaultdict
+
+# détection des quasi-doublons (même histoire reprise par plusieurs sources)
+# MinHash "une permutation" (un seul hash par shingle) + LSH par bandes : coût linéaire
+
+NUM_BINS = 128
+BANDS = 32
+ROWS = NUM_BINS // BANDS
+SHINGLE = 3
+EMPTY = -1
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _shingles(text: str):
+    words = _WORD_RE.findall((text or "").lower())
+    if len(words) < SHINGLE:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + SHINGLE]) for i in range(len(words) - SHINGLE + 1)}
+
+
+def signature(text: str) -> list:
+    """Signature MinHash : pour chaque case, le plus petit hash des shingles qui y tombent."""
+    sig = [EMPTY] * NUM_BINS
+    for sh in _shingles(text):
+        h = zlib.crc32(sh.encode("utf-8"))
+        b, v = h % NUM_BINS, h // NUM_BINS
+        if sig[b] == EMPTY or v < sig[b]:
+            sig[b] = v
+    return sig
+
+
+def similarity(a: list, b: list) -> float:
+    """Estimation de la similarité de Jaccard entre deux signatures."""
+    same = used = 0
+    for x, y in zip(a, b):
+        if x == EMPTY and y == EMPTY:
+            continue
+        used += 1
+        same += x == y
+    return same / used if used else 0.0
+
+
+def _text(article: dict) -> str:
+    return article.get("content") or article.get("summary") or article.get("title") or ""
+
+
+def cluster_near_duplicates(articles: list, threshold: float = 0.5) -> list:
+    """
+    Regroupe les articles quasi identiques.
+    Retourne une liste de groupes (listes d'indices), dans l'ordre de première apparition.
+    """
+    sigs = [signature(_text(a)) for a in articles]
+    parent = list(range(len(articles)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    # LSH : deux articles sont candidats s'ils partagent au moins une bande identique
+    buckets = defaultdict(list)
+    for i, sig in enumerate(sigs):
+        if all(v == EMPTY for v in sig):
+            continue
+        for band in range(BANDS):
+            rows = tuple(sig[band * ROWS:(band + 1) * ROWS])
+            if all(v == EMPTY for v in rows):
+                continue
+            buckets[(band, rows)].append(i)
+
+    checked = set()
+    for members in buckets.values():
+        for a, i in enumerate(members):
+            for j in members[a + 1:]:
+                ri, rj = find(i), find(j)
+                if ri == rj or (i, j) in checked:
+                    continue
+                checked.add((i, j))
+                if similarity(sigs[i], sigs[j]) >= threshold:
+                    parent[max(ri, rj)] = min(ri, rj)
+
+    groups = defaultdict(list)
+    for i in range(len(articles)):
+        groups[find(i)].append(i)
+    return sorted(groups.values(), key=lambda g: g[0])
+
+
+def dedupe_near_duplicates(articles: list, threshold: float = 0.5) -> list:
+    """
+    Garde un seul représentant par groupe de quasi-doublons (le contenu le plus complet)
+    et lui rattache les autres sources dans "also_in".
+    """
+    kept = []
+    for group in cluster_near_duplicates(articles, threshold):
+        best = max(group, key=lambda i: (len(_text(articles[i])), -i))
+        rep = dict(articles[best])
+        others = [articles[i] for i in group if i != best]
+        if others:
+            rep["also_in"] = list(rep.get("also_in", [])) + [
+                {"source": o.get("source", ""), "url": o.get("url", ""), "title": o.get("title", "")}
+                for o in others
+            ]
+        kept.append(rep)
+    return kept
@@ -1,13 +1,19 @@
 # utils_env.py
-from dotenv import load_dotenv
 import os
 
+_loaded = False
+
 def load_env():
-    """Charge les variables d'environnement depuis le fichier .env"""
+    """Charge les variables d'environnement depuis le fichier .env (une seule fois par exécution)"""
+    global _loaded
+    if _loaded:
+        return
     env_path = ".env"
     if not os.path.exists(env_path):
         raise FileNotFoundError(f"Fichier .env introuvable à la racine du projet")
+    from dotenv import load_dotenv
     load_dotenv(env_path)
+    _loaded = True
     print("✅ Variables d'environnement chargées avec succès.")
 
 def get_env_var(key: str, default=None):
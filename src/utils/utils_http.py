@@ -0,0 +1,232 @@
+# utils_http.py
+import json, random, threading, time
+from contextlib import contextmanager
+from pathlib import Path
+from urllib.parse import urlparse
+
+# politesse par hôte : limite de concurrence + délai minimum entre deux requêtes
+
+def host_of(url: str) -> str:
+    """Retourne l'hôte (en minuscules) d'une URL."""
+    return (urlparse(url).netloc or "").lower()
+
+
+class HostScheduler:
+    """
+    Planificateur de politesse par hôte.
+    - max_per_host : nombre de requêtes simultanées autorisées sur un même hôte
+    - min_delay    : délai minimum (s) entre deux débuts de requête sur un même hôte
+    - jitter       : aléa ajouté au délai pour éviter les rafales régulières
+    - overrides    : {host: {"max_per_host": .., "min_delay": .., "jitter": ..}}
+    Des hôtes différents ne s'attendent jamais entre eux.
+    """
+
+    def __init__(self, max_per_host=2, min_delay=1.0, jitter=0.8, overrides=None):
+        self.defaults = {"max_per_host": max_per_host, "min_delay": min_delay, "jitter": jitter}
+        self.overrides = overrides or {}
+        self._lock = threading.Lock()
+        self._hosts = {}
+
+    def _config(self, host):
+        cfg = dict(self.defaults)
+        cfg.update(self.overrides.get(host, {}))
+        return cfg
+
+    def _state(self, host):
+        with self._lock:
+            st = self._hosts.get(host)
+            if st is None:
+                cfg = self._config(host)
+                st = {
+                    "sem": threading.Semaphore(cfg["max_per_host"]),
+                    "gate": threading.Lock(),
+                    "next_at": 0.0,
+                    "cfg": cfg,
+                }
+                self._hosts[host] = st
+            return st
+
+    @contextmanager
+    def slot(self, url: str):
+        """Réserve un créneau pour l'hôte de `url` (bloque le temps nécessaire)."""
+        st = self._state(host_of(url))
+        cfg = st["cfg"]
+        with st["sem"]:
+            with st["gate"]:
+                now = time.monotonic()
+                start = max(now, st["next_at"])
+                st["next_at"] = start + cfg["min_delay"] + random.uniform(0, cfg["jitter"])
+            wait = start - now
+            if wait > 0:
+                time.sleep(wait)
+            yield
+
+
+# --- Cache des validateurs HTTP (ETag / Last-Modified) pour les GET conditionnels ---
+
+class NotModified(Exception):
+    """Le serveur a répondu 304 : rien de nouveau depuis le dernier passage."""
+
+
+class JsonCache:
+    """Petit cache clé → dict persistant dans un fichier JSON (thread-safe)."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._data = None
+
+    def _load(self):
+        if self._data is None:
+            try:
+                self._data = json.loads(self.path.read_text(encoding="utf-8"))
+            except (FileNotFoundError, ValueError):
+                self._data = {}
+        return self._data
+
+    def _save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self._data, ensure_ascii=False), encoding="utf-8")
+        tmp.replace(self.path)
+
+
+class ValidatorCache(JsonCache):
+    """
+    Cache persistant {url: {"etag": .., "modified": ..}}.
+    Les validateurs sont renvoyés au serveur (If-None-Match / If-Modified-Since)
+    pour qu'il réponde 304 sans corps quand la ressource n'a pas changé.
+    Pendant le scraping, les validateurs reçus sont mis en attente (stage) et n'écrasent
+    les anciens qu'une fois les articles sauvegardés (commit) : un crash ou un article
+    en échec ne transforme pas le passage suivant en 304.
+    """
+
+    def __init__(self, path="data/cache/http_validators.json"):
+        super().__init__(path)
+        self._pending = {}
+
+    def stage(self, url: str, etag=None, modified=None):
+        """Validateurs reçus, appliqués seulement au commit()."""
+        with self._lock:
+            self._pending[url] = (etag, modified)
+
+    def commit(self):
+        """Enregistre les validateurs en attente (à appeler une fois les articles persistés)."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for url, (etag, modified) in pending.items():
+            self.update(url, etag=etag, modified=modified)
+
+    def get(self, url: str) -> dict:
+        with self._lock:
+            return dict(self._load().get(url, {}))
+
+    def update(self, url: str, etag=None, modified=None):
+        """Enregistre les validateurs reçus (supprime l'entrée si le serveur n'en fournit plus)."""
+        entry = {k: v for k, v in (("etag", etag), ("modified", modified)) if v}
+        with self._lock:
+            data = self._load()
+            if data.get(url) == entry or (not entry and url not in data):
+                return
+            if entry:
+                data[url] = entry
+            else:
+                data.pop(url, None)
+            self._save()
+
+    def forget(self, *urls):
+        """Oublie les validateurs, en attente ou enregistrés (force un téléchargement complet au prochain passage)."""
+        with self._lock:
+            for u in urls:
+                self._pending.pop(u, None)
+            data = self._load()
+            removed = [u for u in urls if data.pop(u, None) is not None]
+            if removed:
+                self._save()
+
+    def request_headers(self, url: str) -> dict:
+        """En-têtes conditionnels à ajouter à un GET requests."""
+        v = self.get(url)
+        headers = {}
+        if v.get("etag"):
+            headers["If-None-Match"] = v["etag"]
+        if v.get("modified"):
+            headers["If-Modified-Since"] = v["modified"]
+        return headers
+
+
+# --- Session HTTP partagée (connexions keep-alive réutilisées) ---
+
+def make_session(headers=None, proxies=None, pool_size=16) -> "requests.Session":
+    """Session requests avec un pool de connexions dimensionné pour le scraping concurrent."""
+    import requests
+    from requests.adapters import HTTPAdapter
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    if headers:
+        session.headers.update(headers)
+    if proxies:
+        session.proxies.update(proxies)
+    return session
+
+
+# --- Mémoire du niveau d'extraction qui fonctionne pour chaque domaine ---
+
+class TierMemory(JsonCache):
+    """
+    Retient, par domaine, le niveau d'extraction qui a marché ("static" ou "browser").
+    Un domaine marqué "browser" est re-testé en statique après `ttl_days`.
+    """
+
+    def __init__(self, path="data/cache/domain_tiers.json", ttl_days=7):
+        super().__init__(path)
+        self.ttl = ttl_days * 86400
+
+    def get(self, host: str):
+        with self._lock:
+            entry = self._load().get(host)
+        if not entry or time.time() - entry.get("at", 0) > self.ttl:
+            return None
+        return entry.get("tier")
+
+    def record(self, host: str, tier: str):
+        with self._lock:
+            data = self._load()
+            if (data.get(host) or {}).get("tier") == tier and time.time() - data[host].get("at", 0) < self.ttl / 2:
+                return
+            data[host] = {"tier": tier, "at": time.time()}
+            self._save()
+
+
+class SelectorMemory(JsonCache):
+    """
+    Retient, par domaine et sélecteur d'attente, les rendus où le sélecteur n'est jamais apparu.
+    Après `max_misses` échecs consécutifs, le rendu n'attend plus ce sélecteur (délai fixe court)
+    au lieu de payer tout le selector_timeout à chaque article ; re-testé après `ttl_days`.
+    """
+
+    def __init__(self, path="data/cache/selector_misses.json", max_misses=2, ttl_days=7):
+        super().__init__(path)
+        self.max_misses = max_misses
+        self.ttl = ttl_days * 86400
+
+    def skip(self, host: str, selector: str) -> bool:
+        with self._lock:
+            entry = self._load().get(f"{host} {selector}")
+        if not entry or time.time() - entry.get("at", 0) > self.ttl:
+            return False
+        return entry.get("misses", 0) >= self.max_misses
+
+    def record(self, host: str, selector: str, matched: bool):
+        key = f"{host} {selector}"
+        with self._lock:
+            data = self._load()
+            if matched:
+                if data.pop(key, None) is not None:
+                    self._save()
+                return
+            entry = data.get(key) or {}
+            data[key] = {"misses": entry.get("misses", 0) + 1, "at": time.time()}
+            self._save()
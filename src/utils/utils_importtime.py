@@ -0,0 +1,72 @@
+# utils_importtime.py
+import json, os, re, subprocess, sys
+from pathlib import Path
+
+# budget de démarrage : chaque point d'entrée doit s'importer vite, sans client réseau ni dépendance lourde
+# mesure avec `python -X importtime` dans un interpréteur neuf ; code de sortie 1 si un budget est dépassé
+
+ROOT = Path(__file__).resolve().parents[2]
+
+# temps d'import cumulé maximal (ms), stdlib comprise
+BUDGETS_MS = {
+    "src.envoi": 150,
+    "src.pipeline": 150,
+    "src.main": 150,
+    "src.traitement": 150,
+    "src.newsletter_sections": 150,
+    "src.newsletter_template": 50,
+}
+# modules qui ne doivent être chargés qu'à l'usage (premier appel, premier rendu, scraping)
+HEAVY = ("openai", "playwright", "bs4", "feedparser", "requests", "tiktoken", "httpx", "zstandard")
+
+_LINE_RE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s+(.+)$")
+
+
+def measure(module: str) -> dict:
+    """Temps d'import cumulé (ms), modules lourds chargés et effets visibles (sortie standard) d'un module."""
+    probe = (f"import sys, json; import {module}; "
+             f"print('\\0' + json.dumps(sorted(m for m in sys.modules if m.split('.')[0] in {HEAVY!r})))")
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", probe], cwd=ROOT,
+                          capture_output=True, text=True, env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"})
+    if proc.returncode != 0:
+        lines = proc.stderr.strip().splitlines()
+        return {"module": module, "error": lines[-1] if lines else f"code de sortie {proc.returncode}"}
+    cumulative = None
+    for line in proc.stderr.splitlines():
+        m = _LINE_RE.match(line)
+        if m and m.group(3).strip() == module:
+            cumulative = int(m.group(2)) / 1000.0
+    out, _, heavy = proc.stdout.rpartition("\0")
+    return {"module": module, "ms": cumulative, "heavy": json.loads(heavy), "stdout": out.strip()}
+
+
+def check(budgets=None) -> bool:
+    """Mesure chaque module (meilleur de 3 essais) et affiche le bilan ; retourne True si tout est dans le budget."""
+    ok = True
+    for module, budget in (budgets or BUDGETS_MS).items():
+        runs = [measure(module) for _ in range(3)]
+        failed = next((r for r in runs if "error" in r), None)
+        if failed:
+            print(f"❌ {module:<26} import impossible : {failed['error']}")
+            ok = False
+            continue
+        # un essai sans ligne de mesure pour le module (ms None) n'est retenu que si aucun n'en a
+        best = min(runs, key=lambda r: (r["ms"] is None, r["ms"] or 0))
+        problems = []
+        if best["ms"] is None:
+            problems.append("non mesuré")
+        elif best["ms"] > budget:
+            problems.append(f"{best['ms']:.0f} ms > {budget} ms")
+        if best["heavy"]:
+            problems.append("charge " + ", ".join(best["heavy"]))
+        if best["stdout"]:
+            problems.append("affiche à l'import")
+        ok = ok and not problems
+        mark = "❌" if problems else "✅"
+        ms = f"{best['ms']:7.1f}" if best["ms"] is not None else f"{'—':>7}"
+        print(f"{mark} {module:<26} {ms} ms / {budget} ms  {'; '.join(problems)}")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if check() else 1)
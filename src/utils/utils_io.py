@@ -1,33 +1,167 @@
-import json, hashlib, shutil
+import gzip, hashlib, io, json, os
 from datetime import date, datetime
 from pathlib import Path
 
-#lis le dernier fichier dans "data/raw" si y'en a pas le crée
-#créer un dossier avec la date du jour et y mets les articles recup
+# stockage des données du pipeline en JSONL (une ligne par article), compressé, en ajout seul :
+# - write_jsonl / iter_jsonl : un fichier, écrit d'un coup ou lu en flux
+# - SegmentStore : un dossier de segments datés + un manifeste d'empreintes (data/raw)
 
-def _hash(data):
-    return hashlib.md5(json.dumps(data, sort_keys=True).encode()).hexdigest()
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 
-def save_json(data, base="data/raw"):
-    Path(base).mkdir(parents=True, exist_ok=True)
+# "gzip" (défaut), "zstd" (si zstandard est installé) ou "none"
+COMPRESSION = os.getenv("DATA_COMPRESSION", "gzip").lower()
+SUFFIXES = {"gzip": ".jsonl.gz", "zstd": ".jsonl.zst", "none": ".jsonl"}
+# ordre de recherche d'un fichier de données (l'ancien .json reste lisible)
+READ_ORDER = (".jsonl.gz", ".jsonl.zst", ".jsonl", ".json")
 
-    # lire latest.json si présent
-    latest = Path(base) / "latest.json"
-    old_hash = _hash(json.load(open(latest))) if latest.exists() else None
-    new_hash = _hash(data)
 
-    if old_hash == new_hash:
-        print("♻️ Pas de changement, pas de nouveau fichier.")
-        return str(latest)
+def data_suffix(compression: str = None) -> str:
+    compression = compression or COMPRESSION
+    if compression == "zstd" and zstandard is None:
+        compression = "gzip"
+    return SUFFIXES.get(compression, SUFFIXES["gzip"])
+
+
+def _open_write(path: Path, name: str):
+    """Ouvre `path` en écriture texte, compressé selon l'extension de `name` (le nom final)."""
+    if name.endswith(".gz"):
+        return gzip.open(path, "wt", encoding="utf-8", compresslevel=6)
+    if name.endswith(".zst"):
+        raw = open(path, "wb")
+        return io.TextIOWrapper(zstandard.ZstdCompressor(level=6).stream_writer(raw), encoding="utf-8")
+    return open(path, "w", encoding="utf-8")
+
+
+def _open_read(path: Path):
+    if path.name.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    if path.name.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError(f"{path} est compressé en zstd : installer le paquet 'zstandard'")
+        return io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(open(path, "rb")), encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+
+def write_jsonl(path, records) -> Path:
+    """Écrit les enregistrements (une ligne JSON chacun) ; compression selon le suffixe ; écriture atomique."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with _open_write(tmp, path.name) as f:
+        for rec in records:
+            f.write(json.dumps(rec, ensure_ascii=False, separators=(",", ":")))
+            f.write("\n")
+    os.replace(tmp, path)
+    return path
+
+
+def iter_jsonl(path):
+    """Lecture en flux d'un fichier de données (.jsonl[.gz|.zst], ou ancien .json contenant une liste)."""
+    path = Path(path)
+    if path.suffix == ".json":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        yield from (data if isinstance(data, list) else [data])
+        return
+    with _open_read(path) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def find_data_file(folder, stem: str):
+    """Fichier `stem` d'un dossier, quel que soit son format (None s'il n'existe pas)."""
+    for suffix in READ_ORDER:
+        candidate = Path(folder) / f"{stem}{suffix}"
+        if candidate.exists():
+            return candidate
+    return None
+
 
-    # sinon on crée un nouveau fichier daté
-    folder = Path(base) / date.today().strftime("%d-%m-%Y")
-    folder.mkdir(parents=True, exist_ok=True)
-    ts = datetime.now().strftime("%Hh%Mmin%Ss")
-    path = folder / f"artnet_{ts}.json"
+def record_hash(rec) -> str:
+    """Empreinte courte (64 bits) du contenu d'un enregistrement."""
+    payload = json.dumps(rec, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.blake2b(payload, digest_size=8).hexdigest()
 
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-    shutil.copy(path, latest)
+
+class SegmentStore:
+    """
+    Dossier de segments JSONL en ajout seul :
+    - <base>/<dd-mm-YYYY>/<prefix>_<heure>.jsonl.gz : un segment par sauvegarde, nouveaux enregistrements seulement
+    - <base>/manifest.jsonl : une ligne par segment (chemin, nombre, taille, empreintes)
+    La détection de changement se fait sur le manifeste, sans relire les segments.
+    """
+
+    def __init__(self, base="data/raw", prefix="artnet"):
+        self.base = Path(base)
+        self.prefix = prefix
+        self.manifest = self.base / "manifest.jsonl"
+        self._hashes = None
+
+    def _entries(self):
+        if not self.manifest.exists():
+            return
+        with open(self.manifest, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    @property
+    def hashes(self) -> set:
+        if self._hashes is None:
+            self._hashes = {h for e in self._entries() for h in e.get("hashes", [])}
+        return self._hashes
+
+    def append(self, records) -> Path | None:
+        """Écrit un segment avec les enregistrements jamais vus ; None s'il n'y en a aucun."""
+        fresh, seen = [], self.hashes
+        for rec in records:
+            h = record_hash(rec)
+            if h not in seen:
+                seen.add(h)
+                fresh.append((h, rec))
+        if not fresh:
+            return None
+
+        folder = self.base / date.today().strftime("%d-%m-%Y")
+        ts = datetime.now().strftime("%Hh%Mmin%Ss")
+        path, n = folder / f"{self.prefix}_{ts}{data_suffix()}", 1
+        while path.exists():
+            n += 1
+            path = folder / f"{self.prefix}_{ts}-{n}{data_suffix()}"
+        path = write_jsonl(path, (rec for _, rec in fresh))
+        entry = {
+            "segment": path.relative_to(self.base).as_posix(),
+            "records": len(fresh),
+            "bytes": path.stat().st_size,
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "hashes": [h for h, _ in fresh],
+        }
+        with open(self.manifest, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        return path
+
+    def segments(self) -> list:
+        return [self.base / e["segment"] for e in self._entries()]
+
+    def iter_records(self):
+        """Tous les enregistrements, segment par segment (lecture en flux)."""
+        for path in self.segments():
+            if path.exists():
+                yield from iter_jsonl(path)
+
+
+def save_segment(data, base="data/raw"):
+    """Ajoute les articles bruts au stockage en segments ; ne réécrit jamais l'historique."""
+    store = SegmentStore(base)
+    path = store.append(data)
+    if path is None:
+        print("♻️ Pas de changement, pas de nouveau fichier.")
+        return None
     print(f"💾 Fichier sauvegardé → {path}")
     return str(path)
@@ -0,0 +1,206 @@
+# utils_metrics.py
+import json, os, threading, time
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from src.utils.utils_catalog import RUN_ID
+from src.utils.utils_http import host_of
+
+# mesures de l'exécution : durées par étape, requêtes par URL, appels OpenAI, messages SMTP
+# exportées en rapport JSON (un fichier par exécution) et au format texte Prometheus (textfile collector)
+
+METRICS_DIR = Path(os.getenv("METRICS_DIR", "data/metrics"))
+PREFIX = "aiart_"
+MAX_EVENTS = 20000   # par type d'événement, pour borner la taille du rapport
+
+HELP = {
+    "pipeline_seconds": "Durée totale du pipeline",
+    "stage_seconds": "Durée de chaque étape du pipeline",
+    "source_seconds": "Durée du scraping de chaque source",
+    "fetch_seconds": "Latence des requêtes de scraping, par hôte et niveau",
+    "fetch_bytes": "Octets téléchargés, par hôte et niveau",
+    "fetch_requests": "Requêtes de scraping, par hôte, niveau et résultat",
+    "openai_seconds": "Latence des appels OpenAI",
+    "openai_prompt_tokens": "Tokens de prompt consommés",
+    "openai_completion_tokens": "Tokens de réponse consommés",
+    "openai_retries": "Nouvelles tentatives d'appel OpenAI, par type d'erreur",
+    "summary_cache": "Résumés repris du cache (hit) ou demandés à l'API (miss)",
+    "smtp_message_seconds": "Durée d'envoi de chaque message (tentatives et reconnexions comprises)",
+    "smtp_connections": "Connexions SMTP ouvertes",
+}
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels) -> str:
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}" if labels else ""
+
+
+class Metrics:
+    """
+    Registre des mesures d'une exécution (thread-safe).
+    - observe / timer : séries de durées ou de tailles (nombre, somme, min, max)
+    - inc             : compteurs
+    - event           : détail par élément (URL, appel, message) pour le rapport JSON
+    Les helpers fetch / openai_call / smtp_message combinent les trois.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started = time.time()
+            self.summaries = {}
+            self.counters = defaultdict(float)
+            self.events = defaultdict(list)
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None))
+
+    def observe(self, name: str, value: float, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            s = self.summaries.get(key)
+            if s is None:
+                self.summaries[key] = {"count": 1, "sum": value, "min": value, "max": value}
+            else:
+                s["count"] += 1
+                s["sum"] += value
+                s["min"] = min(s["min"], value)
+                s["max"] = max(s["max"], value)
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self.counters[key] += value
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - t0, **labels)
+
+    def event(self, kind: str, **fields):
+        with self._lock:
+            events = self.events[kind]
+            if len(events) < MAX_EVENTS:
+                events.append({"at": round(time.time(), 3), **fields})
+
+    # ---------- Helpers par domaine
+
+    def fetch(self, url: str, tier: str, seconds: float, nbytes=None, status=None, ok=True):
+        """Une requête de scraping (tier : rss, listing, listing-browser, static, browser)."""
+        host = host_of(url)
+        self.event("fetch", url=url, host=host, tier=tier, seconds=round(seconds, 4),
+                   bytes=nbytes, status=status, ok=ok)
+        self.observe("fetch_seconds", seconds, host=host, tier=tier)
+        self.inc("fetch_requests", host=host, tier=tier, result="ok" if ok else "error")
+        if nbytes:
+            self.inc("fetch_bytes", nbytes, host=host, tier=tier)
+
+    def openai_call(self, purpose: str, model: str, seconds: float, response=None):
+        """Un appel OpenAI réussi : latence + tokens (response.usage)."""
+        usage = getattr(response, "usage", None)
+        prompt = getattr(usage, "prompt_tokens", None)
+        completion = getattr(usage, "completion_tokens", None)
+        self.event("openai", purpose=purpose, model=model, seconds=round(seconds, 3),
+                   prompt_tokens=prompt, completion_tokens=completion)
+        self.observe("openai_seconds", seconds, purpose=purpose, model=model)
+        if prompt:
+            self.inc("openai_prompt_tokens", prompt, purpose=purpose, model=model)
+        if completion:
+            self.inc("openai_completion_tokens", completion, purpose=purpose, model=model)
+
+    def smtp_message(self, recipient: str, seconds: float, ok: bool, code=None, attempts=1):
+        status = "sent" if ok else "error"
+        self.event("smtp", recipient=recipient, seconds=round(seconds, 4), ok=ok, code=code, attempts=attempts)
+        self.observe("smtp_message_seconds", seconds, status=status)
+
+    # ---------- Export
+
+    def snapshot(self) -> dict:
+        """Rapport de l'exécution (sérialisable en JSON)."""
+        with self._lock:
+            series = [
+                {"name": name, "labels": dict(labels), **{k: round(v, 6) for k, v in s.items()}}
+                for (name, labels), s in sorted(self.summaries.items())
+            ]
+            counters = [
+                {"name": name, "labels": dict(labels), "value": v}
+                for (name, labels), v in sorted(self.counters.items())
+            ]
+            events = {k: list(v) for k, v in self.events.items()}
+        stages = {s["labels"].get("stage"): round(s["sum"], 3) for s in series if s["name"] == "stage_seconds"}
+        return {
+            "run": RUN_ID,
+            "started": self.started,
+            "finished": time.time(),
+            "stages": stages,
+            "series": series,
+            "counters": counters,
+            "events": events,
+        }
+
+    def prometheus(self, entry=None) -> str:
+        """
+        Format texte Prometheus : chaque série devient un summary (_sum / _count) et une jauge _max,
+        chaque compteur un counter (_total). Une famille = un bloc HELP / TYPE suivi de ses échantillons.
+        `entry` ajoute le label entry="<point d'entrée>" à chaque échantillon.
+        """
+        with self._lock:
+            summaries = sorted(self.summaries.items())
+            counters = sorted(self.counters.items())
+        extra = (("entry", entry),) if entry else ()
+        summaries = [((name, extra + labels), s) for (name, labels), s in summaries]
+        counters = [((name, extra + labels), v) for (name, labels), v in counters]
+        families = defaultdict(list)   # (nom exporté, type, aide) -> lignes
+        for (name, labels), s in summaries:
+            help_ = HELP.get(name, name)
+            families[(f"{PREFIX}{name}", "summary", help_)] += [
+                f"{PREFIX}{name}_sum{_labels(labels)} {s['sum']:.6f}",
+                f"{PREFIX}{name}_count{_labels(labels)} {s['count']}",
+            ]
+            families[(f"{PREFIX}{name}_max", "gauge", f"{help_} (maximum)")].append(
+                f"{PREFIX}{name}_max{_labels(labels)} {s['max']:.6f}")
+        for (name, labels), v in counters:
+            families[(f"{PREFIX}{name}_total", "counter", HELP.get(name, name))].append(
+                f"{PREFIX}{name}_total{_labels(labels)} {v:g}")
+        families[(f"{PREFIX}last_run_timestamp_seconds", "gauge", "Fin de la dernière exécution")].append(
+            f"{PREFIX}last_run_timestamp_seconds{_labels(extra)} {time.time():.0f}")
+
+        lines = []
+        for (metric, kind, help_), samples in families.items():
+            lines.append(f"# HELP {metric} {help_}")
+            lines.append(f"# TYPE {metric} {kind}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+    def flush(self, entry: str, directory=None):
+        """
+        Écrit runs/run_<id>.json et aiart_<entry>.prom (remplacement atomique) ; retourne les deux chemins.
+        Un fichier .prom par point d'entrée (pipeline, traitement, newsletter, envoi) : un lancement isolé
+        n'efface pas les mesures du dernier pipeline, le textfile collector lit tous les fichiers.
+        """
+        directory = Path(directory or METRICS_DIR)
+        (directory / "runs").mkdir(parents=True, exist_ok=True)
+        report = directory / "runs" / f"run_{RUN_ID}.json"
+        report.write_text(json.dumps({"entry": entry, **self.snapshot()}, ensure_ascii=False), encoding="utf-8")
+        prom = directory / f"{PREFIX}{entry}.prom"
+        tmp = prom.with_suffix(".tmp")
+        tmp.write_text(self.prometheus(entry), encoding="utf-8")
+        tmp.replace(prom)
+        # ancien fichier commun : ses séries (sans label entry) resteraient figées
+        (directory / "aiart.prom").unlink(missing_ok=True)
+        print(f"📈 Mesures de l'exécution → {report}")
+        return report, prom
+
+
+# registre partagé par tout le processus
+METRICS = Metrics()
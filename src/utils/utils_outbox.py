@@ -0,0 +1,124 @@
+# utils_outbox.py
+import hashlib, sqlite3, threading, time
+from pathlib import Path
+
+# journal d'envoi (SQLite) : un enregistrement par (newsletter, destinataire), mis à jour à chaque résultat SMTP
+
+DEFAULT_DB = Path("data/cache/outbox.sqlite3")
+
+PENDING, SENT, RETRY, FAILED = "pending", "sent", "retry", "failed"
+# refus d'authentification : le problème vient de la configuration, pas du destinataire
+AUTH_CODES = (530, 534, 535, 538)
+
+
+def newsletter_hash(html: str) -> str:
+    """Empreinte du contenu envoyé (HTML non personnalisé ; le sujet daté n'en fait pas partie)."""
+    return hashlib.sha256(html.encode("utf-8")).hexdigest()
+
+
+def delivery_status(ok: bool, code) -> str:
+    """
+    sent si accepté ; failed sur refus définitif (5xx) du destinataire (RCPT / DATA) ;
+    retry sinon (4xx, réseau, timeout, authentification).
+    """
+    if ok:
+        return SENT
+    if code is not None and 500 <= code < 600 and code not in AUTH_CODES:
+        return FAILED
+    return RETRY
+
+
+class Outbox:
+    """
+    File d'envoi persistante.
+    - enqueue : ajoute les destinataires d'une newsletter (statut pending, sans écraser l'existant)
+    - to_send : destinataires encore à envoyer (pending / retry, et failed sur refus d'authentification)
+    - record  : statut, nombre de tentatives, code et réponse SMTP du dernier essai (commit immédiat)
+    """
+
+    def __init__(self, path=DEFAULT_DB):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        # partagé entre les threads d'envoi, protégé par _lock
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS deliveries ("
+            " newsletter TEXT NOT NULL, recipient TEXT NOT NULL,"
+            " status TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0,"
+            " code INTEGER, response TEXT, updated REAL NOT NULL,"
+            " PRIMARY KEY (newsletter, recipient)"
+            ") WITHOUT ROWID"
+        )
+        self._db.commit()
+
+    def enqueue(self, newsletter: str, recipients) -> int:
+        """Retourne le nombre de destinataires ajoutés."""
+        now = time.time()
+        with self._lock:
+            before = self._db.total_changes
+            self._db.executemany(
+                "INSERT OR IGNORE INTO deliveries(newsletter, recipient, status, updated) VALUES (?, ?, ?, ?)",
+                [(newsletter, r, PENDING, now) for r in recipients],
+            )
+            self._db.commit()
+            return self._db.total_changes - before
+
+    def reset(self, newsletter: str):
+        """Remet tous les destinataires d'une newsletter à envoyer (nouvel envoi complet)."""
+        with self._lock:
+            self._db.execute(
+                "UPDATE deliveries SET status = ?, attempts = 0, code = NULL, response = NULL, updated = ?"
+                " WHERE newsletter = ?",
+                (PENDING, time.time(), newsletter),
+            )
+            self._db.commit()
+
+    def to_send(self, newsletter: str, recipients=None) -> list:
+        """
+        Destinataires pending / retry, dans l'ordre de `recipients` s'il est fourni.
+        Les failed dont le code est un refus d'authentification (journaux d'anciens envois) sont repris.
+        """
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT recipient FROM deliveries WHERE newsletter = ?"
+                f" AND (status IN (?, ?) OR (status = ? AND code IN ({','.join('?' * len(AUTH_CODES))})))",
+                (newsletter, PENDING, RETRY, FAILED, *AUTH_CODES),
+            ).fetchall()
+        todo = {r for (r,) in rows}
+        if recipients is None:
+            return sorted(todo)
+        return [r for r in recipients if r in todo]
+
+    def record(self, newsletter: str, recipient: str, ok: bool, code=None, response=""):
+        status = delivery_status(ok, code)
+        with self._lock:
+            self._db.execute(
+                "UPDATE deliveries SET status = ?, attempts = attempts + 1, code = ?, response = ?, updated = ?"
+                " WHERE newsletter = ? AND recipient = ?",
+                (status, code, response, time.time(), newsletter, recipient),
+            )
+            self._db.commit()
+        return status
+
+    def stats(self, newsletter: str) -> dict:
+        """{statut: nombre} pour une newsletter."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT status, COUNT(*) FROM deliveries WHERE newsletter = ? GROUP BY status", (newsletter,)
+            ).fetchall()
+        return dict(rows)
+
+    def failures(self, newsletter: str) -> list:
+        """[(destinataire, statut, code, réponse)] des envois non aboutis."""
+        with self._lock:
+            return self._db.execute(
+                "SELECT recipient, status, code, response FROM deliveries"
+                " WHERE newsletter = ? AND status IN (?, ?) ORDER BY recipient",
+                (newsletter, RETRY, FAILED),
+            ).fetchall()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
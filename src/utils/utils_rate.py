@@ -0,0 +1,106 @@
+# utils_rate.py
+import random, threading, time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+# limitation de débit pour les appels API : concurrence, requêtes/min, tokens/min
+
+
+class TokenBucket:
+    """Seau à jetons thread-safe : `capacity` jetons, rechargés à `rate` jetons/seconde."""
+
+    def __init__(self, capacity: float, rate: float):
+        self.capacity = float(capacity)
+        self.rate = float(rate)
+        self.tokens = float(capacity)
+        self.stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+
+    def acquire(self, n: float = 1):
+        """Bloque jusqu'à pouvoir consommer `n` jetons (plafonné à la capacité)."""
+        n = min(float(n), self.capacity)
+        while True:
+            with self._lock:
+                self._refill(time.monotonic())
+                if self.tokens >= n:
+                    self.tokens -= n
+                    return
+                wait = (n - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class RateLimiter:
+    """
+    Limiteur combiné pour une API :
+    - max_concurrency : requêtes simultanées
+    - rpm / tpm       : requêtes et tokens par minute (seaux à jetons)
+    - pause(s)        : suspend tous les appels (ex. après un 429 avec Retry-After)
+    """
+
+    def __init__(self, max_concurrency=4, rpm=500, tpm=200_000):
+        self._sem = threading.Semaphore(max_concurrency)
+        self.requests = TokenBucket(rpm, rpm / 60.0)
+        self.tokens = TokenBucket(tpm, tpm / 60.0)
+        self._lock = threading.Lock()
+        self._paused_until = 0.0
+
+    def pause(self, seconds: float):
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def _wait_pause(self):
+        while True:
+            with self._lock:
+                wait = self._paused_until - time.monotonic()
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    @contextmanager
+    def slot(self, tokens: int = 0):
+        """Réserve une requête (et `tokens` tokens estimés) avant l'appel."""
+        with self._sem:
+            self._wait_pause()
+            self.requests.acquire(1)
+            if tokens:
+                self.tokens.acquire(tokens)
+            yield
+
+
+def backoff_delay(attempt: int, base=1.0, cap=60.0) -> float:
+    """Délai exponentiel avec aléa complet (full jitter)."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def retry_after_seconds(headers):
+    """
+    Lit Retry-After (secondes ou date HTTP) / retry-after-ms d'une réponse HTTP ;
+    None si absent ou illisible.
+    """
+    if not headers:
+        return None
+    ms = headers.get("retry-after-ms")
+    if ms:
+        try:
+            return float(ms) / 1000.0
+        except ValueError:
+            pass
+    ra = headers.get("retry-after")
+    if ra:
+        try:
+            return float(ra)
+        except ValueError:
+            pass
+        try:
+            when = parsedate_to_datetime(ra)
+        except (TypeError, ValueError):
+            return None
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=timezone.utc)
+        return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+    return None
@@ -0,0 +1,123 @@
+# utils_seen.py
+import sqlite3, threading, time
+from pathlib import Path
+
+# index des URLs déjà traitées (SQLite) : remplace l'ancien seen_urls.txt
+
+DEFAULT_DB = Path("data/cache/seen_urls.sqlite3")
+LEGACY_TXT = Path("data/cache/seen_urls.txt")
+DAY = 86400
+
+
+class SeenStore:
+    """
+    Index persistant des URLs canoniques déjà vues.
+    - recherche par clé primaire (pas de chargement complet en mémoire)
+    - date de première vue + source pour chaque URL
+    - expiration par source (evict) et compactage (compact)
+    Utilisable comme un set : `url in store`, len(store).
+    """
+
+    def __init__(self, path=DEFAULT_DB, legacy_txt=LEGACY_TXT):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        # partagé entre les threads de scraping, protégé par _lock
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS seen ("
+            " url TEXT PRIMARY KEY, source TEXT NOT NULL DEFAULT '', first_seen REAL NOT NULL"
+            ") WITHOUT ROWID"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS seen_source_age ON seen(source, first_seen)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._db.commit()
+        if legacy_txt and self._meta("legacy_imported") is None:
+            # une seule fois : un index vidé par evict ne doit pas ramener les URLs expirées
+            if len(self) == 0:
+                self._import_legacy(Path(legacy_txt))
+            self._set_meta("legacy_imported", str(time.time()))
+
+    def _meta(self, key: str):
+        with self._lock:
+            row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str):
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO meta(key, value) VALUES (?, ?)", (key, value))
+            self._db.commit()
+
+    def _import_legacy(self, txt: Path):
+        """Reprend une fois l'ancien cache texte (append-only) s'il existe."""
+        if not txt.exists():
+            return
+        with open(txt, "r", encoding="utf-8") as f:
+            urls = [line.strip() for line in f if line.strip()]
+        added = self.add_many(urls, first_seen=txt.stat().st_mtime)
+        print(f"📦 {added} URLs importées depuis {txt}")
+
+    def __contains__(self, url) -> bool:
+        with self._lock:
+            row = self._db.execute("SELECT 1 FROM seen WHERE url = ?", (url,)).fetchone()
+        return row is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM seen").fetchone()[0]
+
+    def first_seen(self, url):
+        """Timestamp (epoch) de première vue, ou None."""
+        with self._lock:
+            row = self._db.execute("SELECT first_seen FROM seen WHERE url = ?", (url,)).fetchone()
+        return row[0] if row else None
+
+    def add_many(self, urls, source="", first_seen=None) -> int:
+        """
+        Insertion en masse ; ignore les URLs déjà présentes (la première vue est conservée).
+        - urls = itérable d'URLs ou de tuples (url, source)
+        Retourne le nombre d'URLs réellement ajoutées.
+        """
+        ts = first_seen or time.time()
+        rows = []
+        for u in urls:
+            url, src = (u if isinstance(u, tuple) else (u, source))
+            if url:
+                rows.append((url, src or "", ts))
+        with self._lock:
+            before = self._db.total_changes
+            self._db.executemany("INSERT OR IGNORE INTO seen(url, source, first_seen) VALUES (?, ?, ?)", rows)
+            self._db.commit()
+            return self._db.total_changes - before
+
+    def evict(self, ttl_days=None, default_ttl_days=None) -> int:
+        """
+        Supprime les URLs plus vieilles que leur TTL.
+        - ttl_days = {source: jours} ; default_ttl_days s'applique aux autres sources
+        Retourne le nombre d'URLs supprimées.
+        """
+        ttl_days = ttl_days or {}
+        now = time.time()
+        with self._lock:
+            before = self._db.total_changes
+            for src, days in ttl_days.items():
+                self._db.execute("DELETE FROM seen WHERE source = ? AND first_seen < ?", (src, now - days * DAY))
+            if default_ttl_days is not None:
+                marks = ",".join("?" * len(ttl_days))
+                where = f" AND source NOT IN ({marks})" if ttl_days else ""
+                self._db.execute(
+                    f"DELETE FROM seen WHERE first_seen < ?{where}",
+                    (now - default_ttl_days * DAY, *ttl_days.keys()),
+                )
+            self._db.commit()
+            return self._db.total_changes - before
+
+    def compact(self):
+        """Récupère l'espace disque libéré par les suppressions."""
+        with self._lock:
+            self._db.execute("VACUUM")
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,308 @@
+# utils_smtp.py
+import base64, queue, smtplib, socket, socketserver, threading, time
+from concurrent.futures import ThreadPoolExecutor
+from src.utils.utils_rate import TokenBucket, backoff_delay
+from src.utils.utils_metrics import METRICS
+
+# envoi SMTP groupé : quelques connexions authentifiées persistantes, plusieurs messages par connexion,
+# débit global configurable, reconnexion sur 421 / coupure / timeout ; un échec de connexion ou
+# d'authentification arrête tout le pool (inutile de le répéter pour chaque destinataire)
+
+RECONNECT_ERRORS = (smtplib.SMTPServerDisconnected, socket.timeout, ConnectionError)
+
+
+def _smtp_code(exc):
+    """Code SMTP d'une exception d'envoi (None si ce n'est pas une réponse du serveur)."""
+    if isinstance(exc, smtplib.SMTPResponseException):
+        return exc.smtp_code
+    if isinstance(exc, smtplib.SMTPRecipientsRefused) and exc.recipients:
+        return min(code for code, _ in exc.recipients.values())
+    return None
+
+
+def _smtp_response(exc) -> str:
+    """Réponse texte du serveur pour une exception d'envoi (sinon le type et le message de l'erreur)."""
+    if isinstance(exc, smtplib.SMTPResponseException):
+        resp = exc.smtp_error
+    elif isinstance(exc, smtplib.SMTPRecipientsRefused) and exc.recipients:
+        resp = next(iter(exc.recipients.values()))[1]
+    else:
+        return f"{type(exc).__name__}: {exc}"
+    return resp.decode("utf-8", errors="replace") if isinstance(resp, bytes) else str(resp)
+
+
+def deliver(server, sender: str, recipient: str, message):
+    """MAIL / RCPT / DATA pour un destinataire ; retourne (code, réponse) finale du serveur."""
+    server.ehlo_or_helo_if_needed()
+    code, resp = server.mail(sender)
+    if code != 250:
+        raise smtplib.SMTPSenderRefused(code, resp, sender)
+    code, resp = server.rcpt(recipient)
+    if code not in (250, 251):
+        raise smtplib.SMTPRecipientsRefused({recipient: (code, resp)})
+    code, resp = server.data(message)
+    return code, resp.decode("utf-8", errors="replace")
+
+
+class SmtpPool:
+    """
+    Pool de `size` connexions SMTP (une par thread d'envoi).
+    - rate_per_min       : messages/minute tous threads confondus (0 = pas de limite)
+    - max_per_connection : la connexion est renouvelée après N messages (limites des fournisseurs)
+    - max_retries        : nouvelles tentatives sur erreur temporaire (421, 4xx, coupure réseau)
+    Connexion, login ou expéditeur refusés (535, 5xx) : arrêt immédiat de tous les threads, l'erreur remonte de send_all ;
+    erreur réseau à la connexion : arrêt après max_retries nouvelles tentatives.
+    """
+
+    def __init__(self, host, port, user=None, password=None, size=3, starttls=True,
+                 timeout=30, rate_per_min=0, max_per_connection=100, max_retries=3):
+        self.host, self.port = host, int(port)
+        self.user, self.password = user, password
+        self.size = max(1, int(size))
+        self.starttls = starttls
+        self.timeout = timeout
+        self.max_per_connection = max_per_connection
+        self.max_retries = max_retries
+        self.bucket = TokenBucket(self.size, rate_per_min / 60.0) if rate_per_min else None
+        self.connects = 0
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            server.ehlo()
+            if self.starttls:
+                server.starttls()
+                server.ehlo()
+            if self.user and self.password:
+                server.login(self.user, self.password)
+        except Exception:
+            self._close(server)
+            raise
+        with self._lock:
+            self.connects += 1
+        METRICS.inc("smtp_connections")
+        return server
+
+    def _open(self, abort):
+        """
+        Connexion pour un thread d'envoi ; None si le pool a été arrêté par un autre thread.
+        Un refus du serveur (authentification, 5xx) arrête le pool aussitôt, une erreur réseau
+        après max_retries nouvelles tentatives : l'erreur est relancée, `abort` prévient les autres threads.
+        """
+        for attempt in range(self.max_retries + 1):
+            if abort.is_set():
+                return None
+            try:
+                return self._connect()
+            except Exception as e:
+                code = _smtp_code(e)
+                refused = isinstance(e, smtplib.SMTPAuthenticationError) or (code is not None and code >= 500)
+                if refused or attempt == self.max_retries:
+                    abort.set()
+                    raise
+                time.sleep(backoff_delay(attempt, base=0.5, cap=10.0))
+
+    @staticmethod
+    def _close(server):
+        if server is None:
+            return
+        try:
+            server.quit()
+        except Exception:
+            try:
+                server.close()
+            except Exception:
+                pass
+
+    def _worker(self, jobs, sender, build, results, on_result, abort):
+        server, sent_on_conn = None, 0
+        try:
+            while not abort.is_set():
+                try:
+                    recipient = jobs.get_nowait()
+                except queue.Empty:
+                    return
+                message = build(recipient)
+                # durée d'envoi du message : tentatives, reconnexions et backoff compris, hors attente du débit
+                t0, throttled = time.perf_counter(), 0.0
+                outcome = None
+                for attempt in range(self.max_retries + 1):
+                    if server is None or sent_on_conn >= self.max_per_connection:
+                        self._close(server)
+                        server, sent_on_conn = self._open(abort), 0
+                        if server is None:
+                            return
+                    # seul l'envoi est dans le try : une fois DATA accepté, rien ne doit provoquer un renvoi
+                    try:
+                        if self.bucket:
+                            t_wait = time.perf_counter()
+                            self.bucket.acquire(1)
+                            throttled += time.perf_counter() - t_wait
+                        code, response = deliver(server, sender, recipient, message)
+                    except Exception as e:
+                        code = _smtp_code(e)
+                        if code == 421 or isinstance(e, RECONNECT_ERRORS):
+                            self._close(server)
+                            server = None
+                        elif server is not None:
+                            try:
+                                server.rset()
+                            except Exception:
+                                self._close(server)
+                                server = None
+                        transient = code is None or 400 <= code < 500
+                        if isinstance(e, smtplib.SMTPSenderRefused) and not transient:
+                            # expéditeur refusé (MAIL FROM) : il le serait pour tous les destinataires
+                            abort.set()
+                            raise
+                        if not transient or attempt == self.max_retries:
+                            outcome = (False, code, _smtp_response(e), attempt + 1)
+                            break
+                        time.sleep(backoff_delay(attempt, base=0.5, cap=10.0))
+                    else:
+                        sent_on_conn += 1
+                        outcome = (True, code, response, attempt + 1)
+                        break
+                ok, code, response, attempts = outcome
+                METRICS.smtp_message(recipient, time.perf_counter() - t0 - throttled, ok, code, attempts)
+                try:
+                    self._report(results, on_result, recipient, ok, code, response)
+                except Exception:
+                    # journal d'envoi en échec : continuer risquerait des doublons à la reprise
+                    abort.set()
+                    raise
+        finally:
+            self._close(server)
+
+    def _report(self, results, on_result, recipient, ok, code, response):
+        with self._lock:
+            results.append((recipient, ok, code, response))
+        if on_result:
+            on_result(recipient, ok, code, response)
+
+    def send_all(self, sender: str, recipients, build, on_result=None) -> list:
+        """
+        Envoie un message à chaque destinataire ; `build(recipient)` fournit le message (str ou bytes).
+        `on_result(destinataire, ok, code, réponse)` est appelé dès chaque résultat (depuis les threads d'envoi).
+        Retourne [(destinataire, ok, code, réponse)] dans l'ordre de fin d'envoi.
+        Si la connexion ou le login échouent, tous les threads s'arrêtent et l'erreur est relancée :
+        les destinataires restants ne reçoivent aucun résultat.
+        """
+        jobs = queue.Queue()
+        for r in recipients:
+            jobs.put(r)
+        results = []
+        abort = threading.Event()
+        workers = min(self.size, jobs.qsize()) or 1
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            futures = [ex.submit(self._worker, jobs, sender, build, results, on_result, abort) for _ in range(workers)]
+            for f in futures:
+                f.result()
+        return results
+
+
+# ---------- Banc d'essai : serveur SMTP local minimal (remplaçant d'aiosmtpd, sans dépendance)
+
+class _SinkHandler(socketserver.StreamRequestHandler):
+    def _reply(self, line):
+        time.sleep(self.server.latency)
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        self._reply("220 sink ready")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            cmd = line.decode(errors="replace").strip().upper()
+            if cmd.startswith(("EHLO", "HELO")):
+                if self.server.password is not None:
+                    self._reply("250-sink")
+                    self._reply("250 AUTH PLAIN")
+                else:
+                    self._reply("250 sink")
+            elif cmd.startswith("AUTH PLAIN "):
+                with self.server.lock:
+                    self.server.auths += 1
+                secret = base64.b64decode(line.split()[-1]).split(b"\0")[-1].decode(errors="replace")
+                if secret == self.server.password:
+                    self._reply("235 authentication successful")
+                else:
+                    self._reply("535 5.7.8 authentication credentials invalid")
+            elif cmd.startswith("MAIL"):
+                with self.server.lock:
+                    self.server.mails += 1
+                    drop = self.server.drop_every and self.server.mails % self.server.drop_every == 0
+                if drop:
+                    self._reply("421 service closing transmission channel")
+                    return
+                self._reply("250 OK")
+            elif cmd.startswith(("RCPT", "RSET", "NOOP")):
+                self._reply("250 OK")
+            elif cmd == "DATA":
+                self._reply("354 end with <CRLF>.<CRLF>")
+                while self.rfile.readline() not in (b".\r\n", b".\n", b""):
+                    pass
+                with self.server.lock:
+                    self.server.received += 1
+                self._reply("250 queued")
+            elif cmd == "QUIT":
+                self._reply("221 bye")
+                return
+            else:
+                self._reply("502 not implemented")
+
+
+class SinkServer(socketserver.ThreadingTCPServer):
+    """
+    Serveur SMTP local qui accepte tout ; `latency` simule le réseau, `drop_every` renvoie un 421,
+    `password` annonce AUTH PLAIN et refuse (535) tout autre mot de passe.
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, latency=0.0, drop_every=0, password=None):
+        super().__init__(("127.0.0.1", 0), _SinkHandler)
+        self.latency, self.drop_every, self.password = latency, drop_every, password
+        self.lock = threading.Lock()
+        self.mails = self.received = self.auths = 0
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+
+def bench(n=200, size=4, latency_ms=20, drop_every=0):
+    """Compare l'envoi historique (une connexion par message) au pool, sur le serveur local."""
+    message = "Subject: bench\r\n\r\nhello\r\n"
+    recipients = [f"user{i}@example.com" for i in range(n)]
+
+    sink = SinkServer(latency_ms / 1000.0)
+    t0 = time.perf_counter()
+    for r in recipients:
+        with smtplib.SMTP(*sink.server_address) as server:
+            server.sendmail("bench@example.com", [r], message)
+    legacy = time.perf_counter() - t0
+    sink.shutdown()
+
+    sink = SinkServer(latency_ms / 1000.0, drop_every)
+    pool = SmtpPool(*sink.server_address, size=size, starttls=False)
+    t0 = time.perf_counter()
+    results = pool.send_all("bench@example.com", recipients, lambda r: message)
+    pooled = time.perf_counter() - t0
+    sink.shutdown()
+
+    ok = sum(1 for _, good, _, _ in results if good)
+    print(f"📊 {n} messages, latence {latency_ms} ms/commande")
+    print(f"   une connexion par message : {legacy:.2f}s ({n / legacy:.0f} msg/s)")
+    print(f"   pool de {size} connexions    : {pooled:.2f}s ({n / pooled:.0f} msg/s), "
+          f"{ok}/{n} envoyés, {pool.connects} connexions, {sink.received} reçus")
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Banc d'essai de l'envoi SMTP groupé (serveur local)")
+    parser.add_argument("-n", type=int, default=200, help="nombre de messages")
+    parser.add_argument("--size", type=int, default=4, help="connexions dans le pool")
+    parser.add_argument("--latency", type=float, default=20, help="latence simulée par commande (ms)")
+    parser.add_argument("--drop-every", type=int, default=0, help="renvoyer un 421 tous les N messages")
+    args = parser.parse_args()
+    bench(args.n, args.size, args.latency, args.drop_every)
@@ -0,0 +1,99 @@
+# utils_summarize.py
+import math
+from collections import Counter
+from src.utils.utils_tokens import split_sentences, is_boilerplate, content_terms
+
+# résumé extractif local (sans API) : TextRank + similarité au centroïde, en pur Python
+
+MAX_SENTENCES = 40     # au-delà, on ne classe que le début de l'article
+DAMPING = 0.85
+ITERATIONS = 30
+TOLERANCE = 1e-5
+
+
+def _vectors(sentences):
+    """Vecteurs TF-IDF normalisés (dict terme → poids) pour chaque phrase."""
+    terms = [content_terms(s) for s in sentences]
+    df = Counter(t for ts in terms for t in set(ts))
+    n = len(sentences)
+    vecs = []
+    for ts in terms:
+        tf = Counter(ts)
+        v = {t: c * math.log(1 + n / df[t]) for t, c in tf.items()}
+        norm = math.sqrt(sum(w * w for w in v.values())) or 1.0
+        vecs.append({t: w / norm for t, w in v.items()})
+    return vecs
+
+
+def _cosine(a, b):
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(w * b.get(t, 0.0) for t, w in a.items())
+
+
+def rank_sentences(sentences, title=""):
+    """Score de chaque phrase : TextRank (graphe de similarité) + proximité au centroïde et au titre."""
+    n = len(sentences)
+    if n == 0:
+        return []
+    vecs = _vectors(sentences)
+    sim = [[0.0] * n for _ in range(n)]
+    for i in range(n):
+        for j in range(i + 1, n):
+            s = _cosine(vecs[i], vecs[j])
+            sim[i][j] = sim[j][i] = s
+    out_weight = [sum(row) or 1.0 for row in sim]
+    # arêtes entrantes normalisées (graphe creux : on ignore les similarités nulles)
+    incoming = [[(j, sim[j][i] / out_weight[j]) for j in range(n) if sim[j][i]] for i in range(n)]
+
+    rank = [1.0 / n] * n
+    for _ in range(ITERATIONS):
+        new = [(1 - DAMPING) / n + DAMPING * sum(w * rank[j] for j, w in inc) for inc in incoming]
+        delta = max(abs(a - b) for a, b in zip(new, rank))
+        rank = new
+        if delta < TOLERANCE:
+            break
+
+    centroid = Counter()
+    for v in vecs:
+        centroid.update(v)
+    norm = math.sqrt(sum(w * w for w in centroid.values())) or 1.0
+    centroid = {t: w / norm for t, w in centroid.items()}
+    title_terms = set(content_terms(title))
+
+    top = max(rank) or 1.0
+    scores = []
+    for i, v in enumerate(vecs):
+        overlap = len(title_terms & v.keys()) / (len(title_terms) or 1)
+        scores.append(rank[i] / top + _cosine(v, centroid) + 0.5 * overlap + 0.2 / (1 + i))
+    return scores
+
+
+def summarize_text(text: str, max_sentences: int = 3, title: str = "") -> str:
+    """Les `max_sentences` meilleures phrases du texte, dans leur ordre d'origine."""
+    sentences = [s for s in split_sentences(text) if not is_boilerplate(s, strict=True) and len(s) > 30]
+    sentences = sentences[:MAX_SENTENCES]
+    if len(sentences) <= max_sentences:
+        return " ".join(sentences)
+    scores = rank_sentences(sentences, title)
+    best = sorted(range(len(sentences)), key=lambda i: scores[i], reverse=True)[:max_sentences]
+    return " ".join(sentences[i] for i in sorted(best))
+
+
+def top_terms(text: str, k: int = 3) -> list:
+    """Les k termes les plus fréquents (tags simples)."""
+    return [t for t, _ in Counter(content_terms(text)).most_common(k)]
+
+
+def local_summary(article: dict, max_sentences: int = 3) -> dict:
+    """Résumé local au même format que celui produit par le modèle (title, source, summary, topic, tags)."""
+    title = article.get("title", "Untitled")
+    content = article.get("content") or article.get("summary") or ""
+    tags = top_terms(title + " " + content)
+    return {
+        "title": title,
+        "source": article.get("source", "Unknown"),
+        "summary": summarize_text(content, max_sentences, title) or title,
+        "topic": tags[0].capitalize() if tags else "",
+        "tags": tags,
+    }
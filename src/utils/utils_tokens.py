@@ -0,0 +1,160 @@
+# utils_tokens.py
+import math, re
+from collections import Counter
+from functools import lru_cache
+
+# comptage de tokens local + réduction extractive du contenu avant envoi au modèle
+
+@lru_cache(maxsize=1)
+def _encoder():
+    """Encodeur tiktoken, chargé au premier comptage (None si tiktoken n'est pas installé)."""
+    try:
+        import tiktoken
+        try:
+            return tiktoken.get_encoding("o200k_base")
+        except Exception:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+_SENT_RE = re.compile(r"(?:(?<=[.!?…])|(?<=[.!?…][\"”’)]))\s+")
+_WORD_RE = re.compile(r"[a-zà-ÿ0-9]{3,}", re.IGNORECASE)
+
+# formes typiques de boilerplate (ligne entière courte : appel à l'action, pied de page, pub) :
+# toujours retirées, elles ne portent jamais l'information de l'article
+STRICT_BOILERPLATE = re.compile(
+    r"^\W*(?:"
+    r"©|copyright\b|all rights reserved|tous droits réservés|"
+    r"(?:advertisement|publicité|sponsored)\W*$|"
+    r"(?:read more|read next|related articles?|more from|lire aussi|à lire également|à lire aussi)\b|"
+    r"(?:subscribe|sign up|abonnez-vous|inscrivez-vous)\b.{0,80}\b(?:newsletter|inbox|updates|alerts)\b|"
+    r"(?:follow us|suivez-nous|share this|click here)\b|"
+    r"(?:terms of (?:use|service)|privacy policy)\W*$|"
+    r"download our app|get the latest\b.{0,60}\b(?:newsletter|inbox|updates)\b|"
+    r"we use cookies|this (?:site|website) uses cookies|"
+    r"(?:avertissement|clause de non-responsabilité|disclaimer)\s*:"
+    r")",
+    re.IGNORECASE,
+)
+STRICT_MAX_CHARS = 160
+
+# mots souvent présents dans la navigation / les pieds de page, mais aussi dans de vraies phrases
+# ("The artist launched a newsletter...") : retirés seulement quand le contenu dépasse le budget
+BOILERPLATE = re.compile(
+    r"(subscribe|sign up|newsletter|cookie|all rights reserved|©|follow us|"
+    r"related articles?|read more|read next|more from|advertisement|share this|"
+    r"click here|terms of (use|service)|privacy policy|get the latest|download our app|"
+    r"abonnez-vous|inscrivez-vous|lire aussi|à lire également|tous droits réservés|"
+    r"suivez-nous|avertissement|clause de non-responsabilité)",
+    re.IGNORECASE,
+)
+
+STOPWORDS = {
+    "the", "and", "for", "that", "with", "this", "from", "are", "was", "were", "has", "have",
+    "had", "its", "his", "her", "their", "they", "but", "not", "you", "will", "would", "can",
+    "which", "who", "what", "when", "where", "been", "also", "than", "into", "about", "more",
+    "les", "des", "une", "est", "pour", "dans", "par", "sur", "qui", "que", "avec", "plus",
+}
+
+
+def count_tokens(text: str) -> int:
+    """Nombre de tokens (tiktoken si installé, sinon estimation mots + ponctuation)."""
+    if not text:
+        return 0
+    enc = _encoder()
+    if enc is not None:
+        return len(enc.encode(text, disallowed_special=()))
+    return math.ceil(len(_TOKEN_RE.findall(text)) * 1.15)
+
+
+def truncate_tokens(text: str, budget: int) -> str:
+    """Coupe `text` après environ `budget` tokens (même comptage que count_tokens)."""
+    enc = _encoder()
+    if enc is not None:
+        ids = enc.encode(text, disallowed_special=())
+        return text if len(ids) <= budget else enc.decode(ids[:budget])
+    keep = int(budget / 1.15)
+    for i, m in enumerate(_TOKEN_RE.finditer(text)):
+        if i == keep:
+            return text[:m.start()].rstrip()
+    return text
+
+
+def split_sentences(text: str) -> list:
+    return [s.strip() for s in _SENT_RE.split(text or "") if s.strip()]
+
+
+def is_boilerplate(sentence: str, strict: bool = False) -> bool:
+    """
+    Phrase de navigation / promo.
+    - strict=True : seulement les lignes courtes à la forme typique (STRICT_BOILERPLATE)
+    - sinon       : aussi toute phrase courte contenant un mot typique (plus agressif)
+    """
+    if len(sentence) < STRICT_MAX_CHARS and STRICT_BOILERPLATE.search(sentence):
+        return True
+    return not strict and len(sentence) < 300 and bool(BOILERPLATE.search(sentence))
+
+
+def content_terms(sentence: str) -> list:
+    """Mots porteurs de sens (3+ lettres, hors mots vides), en minuscules."""
+    return [w for w in (m.lower() for m in _WORD_RE.findall(sentence)) if w not in STOPWORDS]
+
+
+def trim_to_budget(text: str, budget: int, title: str = "") -> tuple:
+    """
+    Réduit `text` à environ `budget` tokens :
+    1) retire les doublons et le boilerplate de forme typique (is_boilerplate strict)
+    2) si c'est trop long, retire aussi les phrases courtes contenant un mot de boilerplate
+    3) si c'est encore trop long, garde les phrases au meilleur score
+       (TF-IDF entre phrases + bonus de position + recouvrement avec le titre),
+       restituées dans leur ordre d'origine.
+    4) si cette sélection n'atteint pas la moitié du budget (texte sans ponctuation, CJK,
+       un seul long paragraphe : aucune phrase ne tient), le texte est simplement coupé au budget.
+    Retourne (texte réduit, tokens avant, tokens après).
+    """
+    before = count_tokens(text)
+    seen, sentences = set(), []
+    for s in split_sentences(text):
+        key = s.lower()
+        if key in seen or is_boilerplate(s, strict=True):
+            continue
+        seen.add(key)
+        sentences.append(s)
+
+    kept = " ".join(sentences)
+    kept_tokens = count_tokens(kept)
+    if not budget or kept_tokens <= budget:
+        return kept, before, kept_tokens
+
+    sentences = [s for s in sentences if not is_boilerplate(s)]
+    kept = " ".join(sentences)
+    kept_tokens = count_tokens(kept)
+    if kept_tokens <= budget:
+        return kept, before, kept_tokens
+
+    terms = [content_terms(s) for s in sentences]
+    df = Counter(t for ts in terms for t in set(ts))
+    n = len(sentences)
+    title_terms = set(content_terms(title))
+    scored = []
+    for i, (s, ts) in enumerate(zip(sentences, terms)):
+        if not ts:
+            continue
+        tf = Counter(ts)
+        tfidf = sum(c * math.log(1 + n / df[t]) for t, c in tf.items()) / math.sqrt(len(ts))
+        position = 1.0 / (1.0 + 0.15 * i)
+        overlap = len(title_terms & tf.keys()) / (len(title_terms) or 1)
+        scored.append((tfidf * (1.0 + position) * (1.0 + overlap), i))
+
+    chosen, used = [], 0
+    for _, i in sorted(scored, reverse=True):
+        cost = count_tokens(sentences[i])
+        if used + cost > budget:
+            continue
+        chosen.append(i)
+        used += cost
+    trimmed = " ".join(sentences[i] for i in sorted(chosen))
+    if used < budget // 2:
+        trimmed = truncate_tokens(kept, budget)
+    return trimmed, before, count_tokens(trimmed)
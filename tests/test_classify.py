@@ -0,0 +1,13 @@
+import pytest
+
+from src.newsletter_sections import CLASSIFIER_CASES, OTHER, classify
+
+
+@pytest.mark.parametrize("item, expected", CLASSIFIER_CASES)
+def test_labelled_cases(item, expected):
+    assert next(iter(classify(item)), OTHER) == expected
+
+
+def test_keyword_after_punctuation():
+    assert "Tokens & Crypto (NFTs)" in classify({"summary": "crypto,nft"})
+    assert classify({"summary": "x:auction"}) == {"Auctions & Sales (upcoming & results)": 1.0}
@@ -0,0 +1,43 @@
+import sys
+import types
+from datetime import date
+
+from src import main
+from src.utils.utils_io import find_data_file, iter_jsonl
+
+
+def _article(i):
+    topics = ["a robot sculptor opens a studio in Lisbon", "Christie's sells a generative triptych",
+              "a museum digitises its print archive", "NFT volumes fall for a third month"]
+    return {"title": topics[i].capitalize(), "url": f"https://example.com/art/{i}", "source": "Example",
+            "content": f"Report {i}: {topics[i]}. " * 5}
+
+
+def _fake_scraper(monkeypatch, batches):
+    scrap = types.ModuleType("src.scrap")
+    # le scraping renvoie tout ce qu'il trouve ; collect() écarte ce que le cache connaît déjà
+    scrap.scrape_all = lambda sites, limit, seen: [("Example", batches.pop(0), None)]
+    scrap.close_browser = scrap.commit_validators = lambda: None
+    monkeypatch.setitem(sys.modules, "src.scrap", scrap)
+
+
+def _day_urls():
+    path = find_data_file(f"data/processed/{date.today():%d-%m-%Y}", "articles")
+    return [a["url"] for a in iter_jsonl(path)]
+
+
+def test_rescrape_same_day_keeps_saved_articles(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    first = [_article(i) for i in range(3)]
+    _fake_scraper(monkeypatch, [first, first, first + [_article(3)]])
+
+    main.collect()
+    assert len(_day_urls()) == 3
+
+    # tout est déjà dans le cache : le fichier du jour n'est pas remplacé par une liste vide
+    main.collect()
+    assert len(_day_urls()) == 3
+
+    # un nouvel article s'ajoute à ceux du matin
+    main.collect()
+    assert _day_urls() == [a["url"] for a in first] + ["https://example.com/art/3"]
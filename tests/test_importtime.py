@@ -0,0 +1,26 @@
+import subprocess
+
+from src.utils import utils_importtime
+from src.utils.utils_importtime import check, measure
+
+
+def test_entry_points_within_budget():
+    assert check()
+
+
+def test_unmeasured_run_is_reported_not_crashing(monkeypatch):
+    runs = iter([{"module": "m", "ms": None, "heavy": [], "stdout": ""},
+                 {"module": "m", "ms": 12.0, "heavy": [], "stdout": ""},
+                 {"module": "m", "ms": None, "heavy": [], "stdout": ""}])
+    monkeypatch.setattr(utils_importtime, "measure", lambda module: next(runs))
+    assert check({"m": 50})
+
+    monkeypatch.setattr(utils_importtime, "measure", lambda module: {"module": module, "ms": None, "heavy": [],
+                                                                     "stdout": ""})
+    assert not check({"m": 50})
+
+
+def test_failed_import_without_stderr(monkeypatch):
+    monkeypatch.setattr(utils_importtime.subprocess, "run",
+                        lambda *args, **kwargs: subprocess.CompletedProcess(args, -9, "", ""))
+    assert measure("src.envoi")["error"] == "code de sortie -9"
@@ -0,0 +1,21 @@
+from src.utils.utils_outbox import FAILED, RETRY, SENT, Outbox, delivery_status
+
+
+def test_delivery_status():
+    assert delivery_status(True, 250) == SENT
+    assert delivery_status(False, 550) == FAILED
+    assert delivery_status(False, 451) == RETRY
+    assert delivery_status(False, None) == RETRY
+    # mauvais mot de passe : à retenter une fois la configuration corrigée
+    assert delivery_status(False, 535) == RETRY
+
+
+def test_to_send_skips_refused_recipients_but_not_auth_failures(tmp_path):
+    outbox = Outbox(tmp_path / "outbox.sqlite3")
+    outbox.enqueue("nl", ["a@x.com", "b@x.com", "c@x.com", "d@x.com"])
+    outbox.record("nl", "a@x.com", True, 250)
+    outbox.record("nl", "b@x.com", False, 550, "no such user")
+    # ligne écrite par un ancien envoi, qui marquait failed les refus de login
+    outbox._db.execute("UPDATE deliveries SET status = ?, code = 535 WHERE recipient = 'c@x.com'", (FAILED,))
+    assert outbox.to_send("nl", ["a@x.com", "b@x.com", "c@x.com", "d@x.com"]) == ["c@x.com", "d@x.com"]
+    outbox.close()
@@ -0,0 +1,46 @@
+import smtplib
+
+import pytest
+
+from src.utils.utils_smtp import SinkServer, SmtpPool
+
+
+@pytest.fixture
+def sink():
+    server = SinkServer(password="secret")
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_send_all_delivers_every_recipient(sink):
+    pool = SmtpPool(*sink.server_address, user="bot", password="secret", size=3, starttls=False)
+    recipients = [f"user{i}@example.com" for i in range(20)]
+    results = pool.send_all("bot@example.com", recipients, lambda r: "Subject: t\r\n\r\nhello\r\n")
+    assert sorted(r for r, ok, _, _ in results if ok) == sorted(recipients)
+    assert sink.received == 20
+
+
+def test_auth_failure_stops_the_whole_pool(sink):
+    pool = SmtpPool(*sink.server_address, user="bot", password="wrong", size=3, starttls=False)
+    reported = []
+    with pytest.raises(smtplib.SMTPAuthenticationError):
+        pool.send_all("bot@example.com", [f"user{i}@example.com" for i in range(50)],
+                      lambda r: "Subject: t\r\n\r\nhello\r\n", on_result=lambda *args: reported.append(args))
+    # au plus un login par thread, aucun message tenté ni signalé
+    assert sink.auths <= pool.size
+    assert sink.mails == 0
+    assert reported == []
+
+
+def test_failing_callback_never_resends_an_accepted_message(sink):
+    pool = SmtpPool(*sink.server_address, user="bot", password="secret", size=1, starttls=False)
+
+    def on_result(recipient, ok, code, response):
+        raise OSError("outbox unavailable")
+
+    with pytest.raises(OSError):
+        pool.send_all("bot@example.com", ["u1@example.com", "u2@example.com"],
+                      lambda r: "Subject: t\r\n\r\nhello\r\n", on_result=on_result)
+    # le message accepté n'est pas renvoyé, et l'envoi s'arrête avant le destinataire suivant
+    assert sink.received == 1
@@ -0,0 +1,10 @@
+from src.utils.utils_summarize import summarize_text
+
+
+def test_sentence_mentioning_a_newsletter_is_kept():
+    text = ("The artist launched a newsletter to document each step of the robotic painting series. "
+            "Subscribe to our newsletter for weekly updates. "
+            "The first canvas sold for twelve thousand dollars at a Paris auction last week.")
+    summary = summarize_text(text, max_sentences=3)
+    assert "The artist launched a newsletter" in summary
+    assert "Subscribe" not in summary
@@ -0,0 +1,16 @@
+from src.utils.utils_tokens import count_tokens, trim_to_budget
+
+
+def test_text_without_punctuation_is_truncated_not_emptied():
+    text = " ".join(f"word{i % 50} artwork sold gallery" for i in range(500))
+    trimmed, before, after = trim_to_budget(text, 300)
+    assert before > 300
+    assert trimmed and text.startswith(trimmed)
+    assert 150 <= after <= 300
+
+
+def test_boilerplate_word_kept_within_budget():
+    text = "The artist launched a newsletter about generative art. Subscribe to our newsletter for updates."
+    trimmed, _, _ = trim_to_budget(text, 1000)
+    assert trimmed == "The artist launched a newsletter about generative art."
+    assert count_tokens(trimmed) > 0